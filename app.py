@@ -1,46 +1,50 @@
 import sys
 import re
 import os
-import numpy as np
-import json
+import io
 from datetime import datetime, timezone
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import queue
+import importlib
+import threading
+try:
+    import msgpack # Optional; only used when config "transcript_format" is "msgpack"
+except ImportError:
+    msgpack = None
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QMessageBox, QDialog, QLineEdit
 )
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QRunnable, QThreadPool, QThread, pyqtSignal
 
 from consent_dialog import ConsentDialog
 from audio_capture import AudioRecorder # Assuming AudioRecorder might raise specific exceptions documented by its library
 from vu_meter_widget import VUMeterWidget
-from live_transcriber import LiveTranscriber
 from live_transcript_widget import LiveTranscriptWidget
-from live_diarizer import LiveDiarizer
 from text_redactor import TextRedactor
-from speech_emotion_recognizer import SpeechEmotionRecognizer
 # encryption_utils can raise ValueError, FileNotFoundError, InvalidTag from cryptography.exceptions
-from encryption_utils import generate_aes_key, wrap_session_key, encrypt_file, derive_key_from_password, SALT
+from encryption_utils import generate_aes_key, wrap_session_key, encrypt_file, encrypt_bytes_to_file, derive_key_from_password, SALT, GCMFileWriter
 from ai_training_consent_dialog import AITrainingConsentDialog
 from session_summary_dialog import SessionSummaryDialog
 from metadata_viewer_dialog import MetadataViewerDialog
 from audit_logger import AuditLogger
-from config_utils import load_or_create_config, CONFIG_FILE_PATH, DEFAULT_CONFIG # Added
+from queue_utils import drain_queue
+from embedding_utils import write_embedding, EMBEDDING_FILE_EXTENSION, EMBEDDING_DTYPE_NAMES, DTYPE_INT8
+import json_utils
+from config_utils import load_or_create_config, ensure_dirs, CONFIG_FILE_PATH, DEFAULT_CONFIG # Added
 
 # Initialize configuration
 config = load_or_create_config(CONFIG_FILE_PATH, DEFAULT_CONFIG)
+# All long-lived directories (sessions output, audit logs, app log) are created here, once.
+ensure_dirs(config)
+# config does not change after startup, so its JSON is encoded once and reused in every session's metadata.json.
+_CONFIG_JSON = json_utils.pre_encode(config)
 
 # --- Setup Logger (using configuration) ---
 # Fallback to DEFAULT_CONFIG values if key is missing, though load_or_create_config should ensure defaults.
 app_log_file_path = config.get("app_log_file", DEFAULT_CONFIG["app_log_file"])
-log_file_dir = os.path.dirname(app_log_file_path)
-if log_file_dir:
-    os.makedirs(log_file_dir, exist_ok=True)
-else:
-    os.makedirs(DEFAULT_CONFIG["audit_log_dir"], exist_ok=True)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -55,6 +59,91 @@ sh.setFormatter(formatter)
 logger.addHandler(fh)
 logger.addHandler(sh)
 
+# --- Transcript file format ---
+# Transcripts are the largest per-session artifacts. "json" (default) writes compact JSON;
+# "msgpack" writes the same segment list as MessagePack, which is smaller and faster to encode.
+_TRANSCRIPT_FORMATS = {"json": ".json", "msgpack": ".msgpack"}
+
+def _dumps_msgpack(obj) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True) # Raises TypeError for unsupported objects, like the JSON encoders
+
+TRANSCRIPT_FORMAT = config.get("transcript_format", DEFAULT_CONFIG["transcript_format"])
+if TRANSCRIPT_FORMAT not in _TRANSCRIPT_FORMATS:
+    logger.warning(f"Unknown transcript_format '{TRANSCRIPT_FORMAT}' in configuration. Using 'json'.")
+    TRANSCRIPT_FORMAT = "json"
+elif TRANSCRIPT_FORMAT == "msgpack" and msgpack is None:
+    logger.warning("transcript_format is 'msgpack' but the msgpack package is not installed. Using 'json'.")
+    TRANSCRIPT_FORMAT = "json"
+TRANSCRIPT_FILE_EXTENSION = _TRANSCRIPT_FORMATS[TRANSCRIPT_FORMAT]
+_encode_transcript = _dumps_msgpack if TRANSCRIPT_FORMAT == "msgpack" else json_utils.dumps_compact
+
+# --- Deferred ML imports ---
+# The live diarizer, transcriber and emotion recognizer pull in torch/transformers/pyannote, which
+# costs seconds at import. They are imported when a recording starts; _prewarm_ml_modules loads
+# them on a background thread once the window is up so the first click does not pay that cost.
+_ML_MODULES = ("live_diarizer", "live_transcriber", "speech_emotion_recognizer")
+
+def _prewarm_ml_modules():
+    for module_name in _ML_MODULES:
+        try:
+            importlib.import_module(module_name)
+            logger.debug(f"Prewarmed module '{module_name}'.")
+        except Exception as e: # Surfaced again, with a dialog, when recording starts
+            logger.warning(f"Background import of '{module_name}' failed: {e}")
+
+# --- Atomic file writes ---
+def _write_file_atomic(path, data):
+    """Writes data to a temporary file next to path and renames it over path, so a crash never leaves a partial file."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f: f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+# --- Background finalization ---
+class SaveEncryptTask(QRunnable):
+    """Runs one session-finalization step (save and/or encrypt an artifact) on a QThreadPool."""
+    def __init__(self, name, fn, *args):
+        super().__init__()
+        self.name = name; self.fn = fn; self.args = args
+
+    def run(self):
+        try:
+            self.fn(*self.args)
+        except Exception as e: # The step functions log their own errors; this only catches escapes
+            logger.error("Unhandled error in finalization task '%s': %s", self.name, e, exc_info=True)
+
+# --- Background master key derivation ---
+class KeyDerivationThread(QThread):
+    """Derives the master key from the password off the UI thread; PBKDF2 is deliberately slow."""
+    key_derived = pyqtSignal(bytes)
+    derivation_failed = pyqtSignal(object) # The exception raised by derive_key_from_password
+
+    def __init__(self, password, parent=None):
+        super().__init__(parent)
+        self.password = password
+
+    def run(self):
+        try:
+            key = derive_key_from_password(self.password, salt=SALT)
+        except Exception as e: # Reported on the UI thread by the derivation_failed slot
+            self.derivation_failed.emit(e); return
+        self.key_derived.emit(key)
+
+# --- Background release of per-session containers ---
+# Dropping the last reference to a long session's transcript segments frees thousands of dicts one by one.
+# _reset_session_specific_vars hands the old containers to this daemon thread so that work leaves the UI thread.
+_release_queue = queue.Queue()
+
+def _release_worker():
+    while True:
+        _release_queue.get() # The returned tuple is discarded here, on this thread, along with its contents
+
+threading.Thread(target=_release_worker, name="session-release", daemon=True).start()
+
 # --- Password Dialog ---
 # (PasswordDialog class remains unchanged as its error handling is mainly QMessageBox for user feedback)
 class PasswordDialog(QDialog):
@@ -105,7 +194,9 @@ class MainApp(QWidget):
         self.current_session_id = None
         self.current_session_dir = None; self.current_session_standard_dir = None
         self.current_session_encrypted_dir = None; self.current_session_key = None
-        self.master_key = None
+        self.current_session_paths = {} # Artifact paths for the active session, see _build_session_paths
+        self.master_key = None; self.key_derivation_thread = None
+        self._finalizing = False # True while _on_stop_button_clicked runs
         self.general_audit_logger = None
         self.audit_logger = None
 
@@ -113,68 +204,79 @@ class MainApp(QWidget):
         self._setup_master_key()
         self._init_ui()
 
-        if self.general_audit_logger: self.general_audit_logger.log_action("APP_STARTUP_COMPLETE", {"encryption_enabled": self.master_key is not None})
+        # While the key is still being derived the outcome is not known yet; MASTER_KEY_DERIVED or MASTER_KEY_DERIVATION_FAILED records it.
+        encryption_status = "pending" if self.key_derivation_thread is not None else ("enabled" if self.master_key is not None else "disabled")
+        if self.general_audit_logger: self.general_audit_logger.log_action("APP_STARTUP_COMPLETE", {"encryption_status": encryption_status})
         else: logger.warning("General audit logger not available after setup.")
 
         self.diarization_update_timer = QTimer(self); self.diarization_update_timer.timeout.connect(self._update_current_speaker); self.diarization_update_timer.setInterval(200)
         self.text_processing_timer = QTimer(self); self.text_processing_timer.timeout.connect(self._process_transcribed_data); self.text_processing_timer.setInterval(100)
         self.emotion_update_timer = QTimer(self); self.emotion_update_timer.timeout.connect(self._update_emotion_display); self.emotion_update_timer.setInterval(300)
+        self.vu_update_timer = QTimer(self); self.vu_update_timer.timeout.connect(self._update_vu_meter); self.vu_update_timer.setInterval(33) # ~30 FPS
         logger.info("MainApp initialization complete.")
 
     def _setup_audit_loggers(self):
-        audit_dir = config.get("audit_log_dir", DEFAULT_CONFIG["audit_log_dir"])
-        try:
-            os.makedirs(audit_dir, exist_ok=True)
-        except OSError as e: # Specific error for os.makedirs
-            logger.critical(f"Failed to create audit log directory '{audit_dir}': {e}", exc_info=True)
-            # Depending on policy, might want to exit or disable audit logging.
-            # For now, it will try to init AuditLogger which might fail again.
-
+        audit_dir = config.get("audit_log_dir", DEFAULT_CONFIG["audit_log_dir"]) # Created at startup by ensure_dirs
         general_audit_log_path = os.path.join(audit_dir, "application_events.log")
-        self.general_audit_logger = AuditLogger(general_audit_log_path) # AuditLogger has its own init error logging
+        # Kept across runs, so it rotates; per-session logs are bounded by their session and are mirrored into an encrypted copy.
+        self.general_audit_logger = AuditLogger(general_audit_log_path, max_bytes=config.get("audit_log_max_bytes", DEFAULT_CONFIG["audit_log_max_bytes"])) # AuditLogger has its own init error logging
         logger.info(f"General audit logger configured at: {general_audit_log_path}")
 
     # _setup_master_key, _init_ui, open_metadata_viewer, run_consent_procedure remain largely unchanged
     # as their primary error modes are user interactions (dialogs) or config (already handled).
-    # os.makedirs in open_metadata_viewer can also raise OSError.
     def _setup_master_key(self):
         logger.info("Setting up master key.")
         dialog = PasswordDialog(self)
         user_password = dialog.get_password()
         if user_password:
-            try:
-                self.master_key = derive_key_from_password(user_password, salt=SALT)
-                logger.info("Master key derived successfully.")
-                if self.general_audit_logger: self.general_audit_logger.log_action("MASTER_KEY_DERIVED", {"derivation_method": "PBKDF2-SHA256"})
-            except ValueError as e: # derive_key_from_password can raise ValueError
-                 logger.error(f"Error deriving master key (likely empty password after dialog): {e}", exc_info=True)
-                 self.master_key = None
-                 QMessageBox.warning(self, "Master Key Error", f"Could not derive master key: {e}")
-            except Exception as e: # Catch other unexpected errors from KDF
-                 logger.critical(f"Unexpected error deriving master key: {e}", exc_info=True)
-                 self.master_key = None
-                 QMessageBox.error(self, "Critical Key Error", f"An unexpected error occurred during master key derivation: {e}")
-
+            # The window is built and shown while the key is derived; recording is enabled once it is ready.
+            self.key_derivation_thread = KeyDerivationThread(user_password, parent=self)
+            self.key_derivation_thread.key_derived.connect(self._on_master_key_derived)
+            self.key_derivation_thread.derivation_failed.connect(self._on_master_key_derivation_failed)
+            self.key_derivation_thread.start()
         else: # No password from dialog
             self.master_key = None
             logger.warning("Master key not provided or password was empty. Encryption disabled.")
             if self.general_audit_logger: self.general_audit_logger.log_action("MASTER_KEY_NOT_PROVIDED", {"encryption_status": "disabled"})
             QMessageBox.warning(self, "Encryption Disabled", "No master password provided or it was empty. File encryption will be disabled.")
 
+    def _on_master_key_derived(self, key):
+        self.master_key = key; self.key_derivation_thread = None
+        logger.info("Master key derived successfully.")
+        if self.general_audit_logger: self.general_audit_logger.log_action("MASTER_KEY_DERIVED", {"derivation_method": "PBKDF2-SHA256"})
+        self._set_ready_status_text(); self.status_label.setText(self._ready_status_text)
+        self.record_button.setEnabled(True)
+
+    def _on_master_key_derivation_failed(self, e):
+        self.master_key = None; self.key_derivation_thread = None
+        if self.general_audit_logger: self.general_audit_logger.log_action("MASTER_KEY_DERIVATION_FAILED", {"encryption_status": "disabled", "error": str(e)})
+        if isinstance(e, ValueError): # derive_key_from_password can raise ValueError
+            logger.error(f"Error deriving master key (likely empty password after dialog): {e}")
+            QMessageBox.warning(self, "Master Key Error", f"Could not derive master key: {e}")
+        else: # Other unexpected errors from KDF
+            logger.critical(f"Unexpected error deriving master key: {e}", exc_info=e)
+            QMessageBox.critical(self, "Critical Key Error", f"An unexpected error occurred during master key derivation: {e}")
+        self._set_ready_status_text(); self.status_label.setText(self._ready_status_text)
+        self.record_button.setEnabled(True)
+
+    def _set_ready_status_text(self):
+        # Changes only when key derivation finishes, so it is computed then rather than on every session stop.
+        self._ready_status_text = "Eden Recorder: Ready to record. Click 'Record' to start." + (
+            " (Encryption DISABLED)" if self.master_key is None else " (Encryption ENABLED)")
+
     def _init_ui(self):
         logger.info("Initializing UI.")
         self.setWindowTitle("Eden Recorder"); self.setGeometry(100, 100, 500, 550)
         layout = QVBoxLayout(self)
-        initial_status = "Eden Recorder: Ready to record. Click 'Record' to start."
-        if self.master_key is None: initial_status += " (Encryption DISABLED)"
-        else: initial_status += " (Encryption ENABLED)"
-        self.status_label = QLabel(initial_status); layout.addWidget(self.status_label)
+        self._set_ready_status_text()
+        key_pending = self.key_derivation_thread is not None
+        self.status_label = QLabel("Eden Recorder: Deriving encryption key..." if key_pending else self._ready_status_text); layout.addWidget(self.status_label)
         self.vu_meter = VUMeterWidget(); layout.addWidget(self.vu_meter)
         self.transcript_widget = LiveTranscriptWidget(transcript_text_queue=self.redacted_text_queue); layout.addWidget(self.transcript_widget)
         self.emotion_label = QLabel("Emotion: ---"); layout.addWidget(self.emotion_label)
 
         main_button_layout = QHBoxLayout()
-        self.record_button = QPushButton("Record"); self.record_button.clicked.connect(self._on_record_button_clicked); main_button_layout.addWidget(self.record_button)
+        self.record_button = QPushButton("Record"); self.record_button.clicked.connect(self._on_record_button_clicked); self.record_button.setEnabled(not key_pending); main_button_layout.addWidget(self.record_button)
         self.stop_button = QPushButton("Stop"); self.stop_button.clicked.connect(self._on_stop_button_clicked); self.stop_button.setEnabled(False); main_button_layout.addWidget(self.stop_button)
         layout.addLayout(main_button_layout)
 
@@ -190,15 +292,7 @@ class MainApp(QWidget):
 
     def open_metadata_viewer(self):
         logger.info("Opening metadata viewer dialog.")
-        if not os.path.exists(self.base_output_dir):
-            try:
-                os.makedirs(self.base_output_dir, exist_ok=True)
-                logger.info(f"Created base output directory for metadata viewer: {self.base_output_dir}")
-            except OSError as e:
-                logger.error(f"Failed to create base output directory '{self.base_output_dir}': {e}", exc_info=True)
-                QMessageBox.warning(self, "Directory Error", f"Could not create directory for sessions: {e}")
-                return # Don't open dialog if dir creation failed
-
+        # base_output_dir is created at startup; the dialog itself falls back to "." if it is missing.
         dialog = MetadataViewerDialog(parent=self, initial_dir=self.base_output_dir)
         dialog.exec_()
         logger.info("Metadata viewer dialog closed.")
@@ -229,16 +323,23 @@ class MainApp(QWidget):
             QMessageBox.warning(self, "Consent Required", "Recording cannot start without user consent.")
             return
 
-        self.current_session_id = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%f")[:-3] + "Z"
+        # Formatted directly rather than via strftime + slicing; same "YYYYMMDD_HHMMSS_mmmZ" shape.
+        dt = datetime.now(timezone.utc)
+        self.current_session_id = f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}_{dt.microsecond // 1000:03d}Z"
         logger.info(f"New session ID: {self.current_session_id}")
 
+        # Same prefix-concatenation scheme as _build_session_paths; the session ID contains no separators.
         self.current_session_dir = os.path.join(self.base_output_dir, self.current_session_id)
-        self.current_session_standard_dir = os.path.join(self.current_session_dir, "standard_data")
-        self.current_session_encrypted_dir = os.path.join(self.current_session_dir, "encrypted_data")
+        self.current_session_standard_dir = self.current_session_dir + os.sep + "standard_data"
+        self.current_session_encrypted_dir = self.current_session_dir + os.sep + "encrypted_data"
+        self.current_session_paths = self._build_session_paths()
 
         try:
-            os.makedirs(self.current_session_standard_dir, exist_ok=True)
-            os.makedirs(self.current_session_encrypted_dir, exist_ok=True)
+            # The sessions root exists from startup and the session dir is new, so plain mkdirs
+            # suffice (no exist_ok stat round-trips); a clash on an existing ID raises instead.
+            os.mkdir(self.current_session_dir)
+            os.mkdir(self.current_session_standard_dir)
+            os.mkdir(self.current_session_encrypted_dir)
             logger.info(f"Session directories created: Standard='{self.current_session_standard_dir}', Encrypted='{self.current_session_encrypted_dir}'")
         except OSError as e:
             logger.critical(f"Failed to create session directories for '{self.current_session_id}': {e}", exc_info=True)
@@ -246,7 +347,7 @@ class MainApp(QWidget):
             self._reset_session_specific_vars() # Clean up
             return
 
-        session_audit_log_path = os.path.join(self.current_session_standard_dir, "session_audit_log.jsonl")
+        session_audit_log_path = self.current_session_paths["session_audit_log_standard"]
         self.audit_logger = AuditLogger(session_audit_log_path)
         logger.info(f"Session audit logger configured for: {session_audit_log_path}")
         if self.audit_logger: self.audit_logger.log_action("SESSION_START", {"session_id": self.current_session_id})
@@ -261,17 +362,40 @@ class MainApp(QWidget):
                  QMessageBox.critical(self, "Key Generation Error", f"Could not generate session key: {e}")
                  self._reset_session_specific_vars()
                  return
+
+            # Wrap the session key exactly once, up front; every artifact is then encrypted with the raw
+            # session key and the stop path never touches the master key.
+            if not self._save_wrapped_session_key():
+                QMessageBox.critical(self, "Key Wrapping Error", "Could not save the wrapped session key. Recording aborted.")
+                self._reset_session_specific_vars()
+                return
+
+            # The encrypted audit log is built as events are appended; the stop path then only writes the GCM tag.
+            try:
+                self.audit_logger.attach_encrypted_sink(GCMFileWriter(self.current_session_paths["session_audit_log_encrypted"], self.current_session_key))
+            except Exception as e: # Not fatal: the stop path falls back to encrypting the finished log
+                logger.warning(f"Could not start incremental encryption of the session audit log: {e}", exc_info=True)
         else: # No master key
             self.current_session_key = None
             logger.warning(f"Master key not available. Session {self.current_session_id} will not be encrypted.")
             if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_NOT_GENERATED", {"reason": "Master key missing", "session_id": self.current_session_id})
 
-        raw_audio_filename = "raw_session_audio.wav"
-        raw_audio_path_standard = os.path.join(self.current_session_standard_dir, raw_audio_filename)
+        try:
+            from live_diarizer import LiveDiarizer
+            from live_transcriber import LiveTranscriber
+            from speech_emotion_recognizer import SpeechEmotionRecognizer
+        except ImportError as e:
+            logger.critical(f"Failed to import live processing modules: {e}", exc_info=True)
+            QMessageBox.critical(self, "Module Error", f"Could not load live processing components: {e}")
+            self._reset_session_specific_vars()
+            return
+
+        raw_audio_path_standard = self.current_session_paths["raw_audio_standard"]
 
         try:
-            self.audio_recorder = AudioRecorder(output_filepath=raw_audio_path_standard, vu_meter_callback=self.vu_meter.update_vu)
+            self.audio_recorder = AudioRecorder(output_filepath=raw_audio_path_standard)
             self.audio_recorder.start_recording()
+            self.vu_update_timer.start()
             logger.info(f"Audio recording started. Output to: {raw_audio_path_standard}")
             if self.audit_logger: self.audit_logger.log_action("AUDIO_RECORDING_STARTED", {"path": raw_audio_path_standard})
         except (IOError, OSError) as e: # More specific for file/device access
@@ -312,7 +436,7 @@ class MainApp(QWidget):
         self.emotion_update_timer.start()
         logger.info("Speech emotion recognition started.")
 
-        self.transcript_widget.start_updates()
+        self.transcript_widget.timer.start() # Stopped by the previous session's _finalize_session
         self.status_label.setText(f"Recording session: {self.current_session_id}...")
         self.record_button.setEnabled(False); self.stop_button.setEnabled(True)
         logger.info("UI updated for active recording session.")
@@ -320,49 +444,203 @@ class MainApp(QWidget):
 
     def _map_pii_chars_to_audio_time(self, pii_entity, word_timestamps, segment_text): return None, None
     def _process_transcribed_data(self): pass
-    def _update_current_speaker(self): pass
-    def _update_emotion_display(self): pass
 
-    def _save_and_encrypt_voice_embeddings(self):
+    def _update_current_speaker(self):
+        """Diarization timer slot. Takes every pending result at once; only the newest label is pushed to the widget."""
+        if not self.diarization_result_queue: return
+        results = drain_queue(self.diarization_result_queue)
+        if not results: return
+        for speaker_label, _start_s, _end_s, embedding in results:
+            if embedding is not None and embedding.size: # Short turns come back with an empty embedding
+                self.session_voice_prints[speaker_label] = {"embedding": embedding} # Latest embedding per speaker
+        last_label = results[-1][0]
+        if last_label != self.current_speaker_label: # One widget update per tick, and only on change
+            self.current_speaker_label = last_label
+            self.transcript_widget.set_current_speaker(last_label)
+
+    def _update_emotion_display(self):
+        """Emotion timer slot. Records every pending result but sets the label text once, from the newest."""
+        if not self.emotion_results_queue: return
+        results = drain_queue(self.emotion_results_queue)
+        if not results: return
+        for timestamp, emotion, confidence, predictions, _raw_confidence in results:
+            self.session_emotion_annotations.append({"segment_start_time_seconds": timestamp, "dominant_emotion": emotion,
+                                                     "score": confidence, "all_predictions": predictions})
+        _, emotion, confidence = results[-1][:3]
+        self.emotion_label.setText(f"Emotion: {emotion} ({confidence:.2f})")
+
+    def _update_vu_meter(self):
+        """Polls the recorder's latest level on the GUI thread; the audio thread never calls into Qt."""
+        self.vu_meter.update_vu(self.audio_recorder.latest_level if self.audio_recorder else 0.0)
+
+    def _save_and_encrypt_voice_embeddings(self, pool):
+        """Submits one save/encrypt task per speaker to pool, so the per-speaker files are written concurrently."""
         logger.info("Attempting to save and encrypt voice embeddings.")
-        any_saved = False; any_encrypted = False
         if not self.session_voice_prints:
             logger.info("No voice prints captured in this session to save.")
-            return False, False
-
+            return
+        keep_plaintext = self._keep_plaintext_artifacts()
         for speaker_id, embedding_data in self.session_voice_prints.items():
-            filename = f"voice_embedding_{speaker_id}.npy"
-            filepath_standard = os.path.join(self.current_session_standard_dir, filename)
-            try:
-                np.save(filepath_standard, embedding_data['embedding']) # Can raise IOError/OSError
-                self.session_voice_print_filepaths[speaker_id] = {"standard": filepath_standard, "encrypted": None}
-                logger.info(f"Voice embedding for {speaker_id} saved to {filepath_standard}")
-                any_saved = True
+            pool.start(SaveEncryptTask(f"voice_embedding_{speaker_id}", self._save_voice_embedding, speaker_id, embedding_data, keep_plaintext))
+
+    def _save_voice_embedding(self, speaker_id, embedding_data, keep_plaintext):
+        """
+        Saves one speaker's voice embedding and its encrypted copy. Runs on a worker thread.
+        :return: Tuple (saved, encrypted) of booleans.
+        """
+        filename = f"voice_embedding_{speaker_id}{EMBEDDING_FILE_EXTENSION}"
+        filepath_standard = self.current_session_paths["standard_prefix"] + filename
+        saved, encrypted = False, False
+        try:
+            # Serialize once; the same bytes feed both the plaintext write and the encryption.
+            buf = io.BytesIO(); write_embedding(buf, embedding_data['embedding'])
+            embedding_bytes = buf.getvalue()
+            filepaths = self.session_voice_print_filepaths[speaker_id] = {"standard": None, "encrypted": None}
+            if keep_plaintext:
+                with open(filepath_standard, 'wb') as f: f.write(embedding_bytes) # Can raise IOError/OSError
+                filepaths["standard"] = filepath_standard
+                logger.info("Voice embedding for %s saved to %s", speaker_id, filepath_standard); saved = True
                 if self.audit_logger: self.audit_logger.log_action("FILE_SAVED_STANDARD", {"type": "voice_embedding", "speaker": speaker_id, "path": filepath_standard})
 
-                if self.master_key and self.current_session_key:
-                    filepath_encrypted = os.path.join(self.current_session_encrypted_dir, f"{filename}.enc")
-                    encrypt_file(filepath_standard, self.current_session_key, filepath_encrypted) # Can raise FileNotFoundError, ValueError, InvalidTag
-                    self.session_voice_print_filepaths[speaker_id]["encrypted"] = filepath_encrypted
-                    logger.info(f"Encrypted voice embedding for {speaker_id} to {filepath_encrypted}")
-                    any_encrypted = True
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "voice_embedding", "speaker": speaker_id, "path": filepath_encrypted})
-                elif self.master_key is None:
-                     logger.warning(f"Master key not set. Skipping encryption for voice embedding of {speaker_id}.")
-            except (IOError, OSError) as e:
-                logger.error(f"I/O error processing voice embedding for {speaker_id}: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_IO_ERROR", {"speaker": speaker_id, "error": str(e)})
-            except ValueError as e: # From encryption_utils or np.save if data is bad
-                logger.error(f"Value error processing voice embedding for {speaker_id}: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_VALUE_ERROR", {"speaker": speaker_id, "error": str(e)})
-            except Exception as e: # Fallback for other errors (e.g. cryptography.exceptions.InvalidTag though unlikely here)
-                logger.error(f"Unexpected error processing voice embedding for {speaker_id}: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_ERROR", {"speaker": speaker_id, "error": str(e)})
-        return any_saved, any_encrypted
+            if self.master_key and self.current_session_key:
+                filepath_encrypted = f"{self.current_session_paths['encrypted_prefix']}{filename}.enc"
+                encrypt_bytes_to_file(embedding_bytes, self.current_session_key, filepath_encrypted) # Can raise ValueError
+                filepaths["encrypted"] = filepath_encrypted
+                logger.info("Encrypted voice embedding for %s to %s", speaker_id, filepath_encrypted); encrypted = True
+                if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "voice_embedding", "speaker": speaker_id, "path": filepath_encrypted})
+            elif self.master_key is None:
+                 logger.warning("Master key not set. Skipping encryption for voice embedding of %s.", speaker_id)
+        except (IOError, OSError) as e:
+            logger.error("I/O error processing voice embedding for %s: %s", speaker_id, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_IO_ERROR", {"speaker": speaker_id, "error": str(e)})
+        except ValueError as e: # From encryption_utils or write_embedding if data is bad
+            logger.error("Value error processing voice embedding for %s: %s", speaker_id, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_VALUE_ERROR", {"speaker": speaker_id, "error": str(e)})
+        except Exception as e: # Fallback for other errors (e.g. cryptography.exceptions.InvalidTag though unlikely here)
+            logger.error("Unexpected error processing voice embedding for %s: %s", speaker_id, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("VOICE_EMBEDDING_ERROR", {"speaker": speaker_id, "error": str(e)})
+        return saved, encrypted
+
+    # kind -> (current_session_paths key prefix, encoder, plaintext copy governed by keep_plaintext_artifacts)
+    _JSON_ARTIFACTS = {
+        "raw_transcript": ("full_transcript_raw", _encode_transcript, True), # Compact JSON or msgpack: read by programs, not people
+        "redacted_transcript": ("full_transcript_redacted", _encode_transcript, True),
+        "metadata_json": ("metadata", json_utils.dumps_pretty, False), # Always kept: it is the session index
+    }
+
+    def _persist_json_artifact(self, kind, obj):
+        """
+        Serializes obj once, writes the plaintext copy and encrypts the same bytes from memory.
+        Safe to run on a worker thread.
+        :param kind: Key of _JSON_ARTIFACTS; also the "type" recorded in the audit log.
+        :param obj: JSON-serializable object to persist.
+        :return: Tuple (saved, encrypted) of booleans.
+        """
+        path_key, encode, optional_plaintext = self._JSON_ARTIFACTS[kind]
+        saved, encrypted = False, False
+        try:
+            data_bytes = encode(obj)
+            if not optional_plaintext or self._keep_plaintext_artifacts():
+                path_standard = self.current_session_paths[f"{path_key}_standard"]
+                _write_file_atomic(path_standard, data_bytes)
+                logger.info("%s saved to %s", kind, path_standard); saved = True
+                if self.audit_logger: self.audit_logger.log_action("FILE_SAVED_STANDARD", {"type": kind, "path": path_standard})
+            if self.master_key and self.current_session_key:
+                path_encrypted = self.current_session_paths[f"{path_key}_encrypted"]
+                encrypt_bytes_to_file(data_bytes, self.current_session_key, path_encrypted)
+                logger.info("%s encrypted to %s", kind, path_encrypted); encrypted = True
+                if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": kind, "path": path_encrypted})
+            elif self.master_key is None: logger.warning("Master key not set. Skipping encryption of %s.", kind)
+        except (IOError, OSError) as e: logger.error("I/O error saving/encrypting %s: %s", kind, e, exc_info=True)
+        except TypeError as e: logger.error("Type error saving %s (data not JSON serializable?): %s", kind, e, exc_info=True)
+        except ValueError as e: logger.error("Value error during %s encryption: %s", kind, e, exc_info=True) # From encrypt_bytes_to_file
+        except Exception as e: logger.error("Unexpected error saving/encrypting %s: %s", kind, e, exc_info=True)
+        return saved, encrypted
+
+    @staticmethod
+    def _render_session_summary(metadata_content, out):
+        """Precomputes SessionSummaryDialog's widget-free content into out. Runs on a worker thread."""
+        out["raw_metadata_text"] = SessionSummaryDialog.format_raw_metadata(metadata_content)
+
+    def _save_raw_audio(self, raw_audio_path):
+        """
+        Writes the raw session audio and, with encryption enabled, its encrypted copy from the same bytes in one pass,
+        so the WAV file is never read back. Runs on a worker thread.
+        """
+        encrypted_audio_path = self.current_session_paths["raw_audio_encrypted"]
+        sink = None
+        try:
+            if self.master_key and self.current_session_key: sink = GCMFileWriter(encrypted_audio_path, self.current_session_key)
+            if not self.audio_recorder.save_recording(raw_audio_path, encrypted_sink=sink):
+                logger.warning("No audio frames were recorded. Skipping raw audio save."); return
+            logger.info("Raw audio saved to: %s", raw_audio_path)
+            if sink:
+                sink.close(); sink = None
+                logger.info("Raw audio encrypted to: %s", encrypted_audio_path)
+                if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "raw_audio", "path": encrypted_audio_path})
+        except (IOError, OSError) as e:
+            logger.error("I/O error saving/encrypting raw audio file '%s': %s", raw_audio_path, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_IO_FAILED", {"type": "raw_audio", "error": str(e)})
+        except ValueError as e: # From encryption
+            logger.error("Value error saving/encrypting raw audio file '%s': %s", raw_audio_path, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_VALUE_ERROR", {"type": "raw_audio", "error": str(e)})
+        except Exception as e: # Fallback
+            logger.error("Unexpected error saving/encrypting raw audio file '%s': %s", raw_audio_path, e, exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_FAILED", {"type": "raw_audio", "error": str(e)})
+        finally:
+            if sink: sink.abort() # Failed part-way: no truncated ciphertext is left behind
+
+    def _build_session_paths(self) -> dict:
+        """Builds every fixed per-session artifact path once, at session start, from two directory prefixes."""
+        std = self.current_session_standard_dir + os.sep
+        enc = self.current_session_encrypted_dir + os.sep
+        return {
+            "standard_prefix": std, # For per-speaker files named at stop time
+            "encrypted_prefix": enc,
+            "raw_audio_standard": std + "raw_session_audio.wav",
+            "raw_audio_encrypted": enc + "raw_session_audio.wav.enc",
+            "full_transcript_raw_standard": f"{std}full_transcript_raw{TRANSCRIPT_FILE_EXTENSION}",
+            "full_transcript_raw_encrypted": f"{enc}full_transcript_raw{TRANSCRIPT_FILE_EXTENSION}.enc",
+            "full_transcript_redacted_standard": f"{std}full_transcript_redacted{TRANSCRIPT_FILE_EXTENSION}",
+            "full_transcript_redacted_encrypted": f"{enc}full_transcript_redacted{TRANSCRIPT_FILE_EXTENSION}.enc",
+            "session_audit_log_standard": std + "session_audit_log.jsonl",
+            "session_audit_log_encrypted": enc + "session_audit_log.jsonl.enc",
+            "metadata_standard": std + "metadata.json",
+            "metadata_encrypted": enc + "metadata.json.enc",
+            "wrapped_session_key": self.current_session_dir + os.sep + "session_key.ek",
+        }
+
+    def _save_wrapped_session_key(self) -> bool:
+        """Wraps the session key with the master key and writes it atomically (tmp file + os.replace)."""
+        wrapped_key_path = self.current_session_paths["wrapped_session_key"]
+        try:
+            wrapped_key = wrap_session_key(self.current_session_key, self.master_key)
+            _write_file_atomic(wrapped_key_path, wrapped_key) # Can raise IOError/OSError
+            logger.info(f"Wrapped session key saved to: {wrapped_key_path}")
+            if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPED_AND_SAVED", {"path": wrapped_key_path})
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"I/O error wrapping and saving session key: {e}", exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_IO_FAILED", {"error": str(e)})
+        except ValueError as e: # From wrap_session_key
+            logger.error(f"Value error wrapping session key: {e}", exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_VALUE_ERROR", {"error": str(e)})
+        except Exception as e: # Fallback (e.g. cryptography exceptions if any)
+            logger.error(f"Unexpected error wrapping and saving session key: {e}", exc_info=True)
+            if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_FAILED", {"error": str(e)})
+        return False
+
+    def _keep_plaintext_artifacts(self) -> bool:
+        """Plaintext copies are always written when encryption is off; otherwise the config decides."""
+        if not (self.master_key and self.current_session_key):
+            return True
+        return bool(config.get("keep_plaintext_artifacts", DEFAULT_CONFIG["keep_plaintext_artifacts"]))
 
     def _generate_metadata_dict(self) -> dict: # (No significant I/O here, mostly data compilation)
         logger.debug("Generating metadata dictionary.")
-        # ... (content as before)
+        keep_plaintext = self._keep_plaintext_artifacts()
+        session_paths = self.current_session_paths
+        encrypted = bool(self.master_key)
         return {
             "session_id": self.current_session_id,
             "start_time_utc": self.audio_recorder.start_time.isoformat() if self.audio_recorder and self.audio_recorder.start_time else None,
@@ -373,17 +651,18 @@ class MainApp(QWidget):
             "consent_timestamp_utc": self.session_consent_timestamp.isoformat() if self.session_consent_timestamp else None,
             "consent_expiry_utc": self.session_consent_expiry.isoformat() if self.session_consent_expiry else None,
             "files": {
-                "raw_audio_standard": os.path.join(self.current_session_standard_dir, "raw_session_audio.wav") if self.current_session_standard_dir else None,
-                "raw_audio_encrypted": os.path.join(self.current_session_encrypted_dir, "raw_session_audio.wav.enc") if self.master_key and self.current_session_encrypted_dir else None,
-                "full_transcript_raw_standard": os.path.join(self.current_session_standard_dir, "full_transcript_raw.json") if self.current_session_standard_dir else None,
-                "full_transcript_raw_encrypted": os.path.join(self.current_session_encrypted_dir, "full_transcript_raw.json.enc") if self.master_key and self.current_session_encrypted_dir else None,
-                "full_transcript_redacted_standard": os.path.join(self.current_session_standard_dir, "full_transcript_redacted.json") if self.current_session_standard_dir else None,
-                "full_transcript_redacted_encrypted": os.path.join(self.current_session_encrypted_dir, "full_transcript_redacted.json.enc") if self.master_key and self.current_session_encrypted_dir else None,
-                "session_audit_log_standard": os.path.join(self.current_session_standard_dir, "session_audit_log.jsonl") if self.current_session_standard_dir else None,
-                "session_audit_log_encrypted": os.path.join(self.current_session_encrypted_dir, "session_audit_log.jsonl.enc") if self.master_key and self.current_session_encrypted_dir else None,
-                "voice_embeddings_standard": {sid: paths["standard"] for sid, paths in self.session_voice_print_filepaths.items()},
+                "raw_audio_standard": session_paths.get("raw_audio_standard"),
+                "raw_audio_encrypted": session_paths.get("raw_audio_encrypted") if encrypted else None,
+                "full_transcript_raw_standard": session_paths.get("full_transcript_raw_standard") if keep_plaintext else None,
+                "full_transcript_raw_encrypted": session_paths.get("full_transcript_raw_encrypted") if encrypted else None,
+                "full_transcript_redacted_standard": session_paths.get("full_transcript_redacted_standard") if keep_plaintext else None,
+                "full_transcript_redacted_encrypted": session_paths.get("full_transcript_redacted_encrypted") if encrypted else None,
+                "session_audit_log_standard": session_paths.get("session_audit_log_standard"),
+                "session_audit_log_encrypted": session_paths.get("session_audit_log_encrypted") if encrypted else None,
+                "voice_embeddings_standard": {sid: paths["standard"] for sid, paths in self.session_voice_print_filepaths.items() if paths.get("standard")},
                 "voice_embeddings_encrypted": {sid: paths["encrypted"] for sid, paths in self.session_voice_print_filepaths.items() if paths.get("encrypted")},
-                "wrapped_session_key": os.path.join(self.current_session_dir, "session_key.ek") if self.master_key and self.current_session_dir else None,
+                "voice_embeddings_dtype": EMBEDDING_DTYPE_NAMES[DTYPE_INT8] if self.session_voice_print_filepaths else None,
+                "wrapped_session_key": session_paths.get("wrapped_session_key") if encrypted else None,
             },
             "phi_pii_details": self.session_phi_pii_details,
             "phi_pii_audio_mute_segments": self.session_phi_pii_audio_mute_segments,
@@ -399,32 +678,48 @@ class MainApp(QWidget):
 
     def _on_stop_button_clicked(self):
         logger.info("Stop button clicked. Finalizing session.")
+        # The window keeps processing events while finalization tasks run (see _wait_for_pool): Stop must not re-enter,
+        # and the metadata viewer must not open a session that is still being written.
+        self.stop_button.setEnabled(False); self.view_metadata_button.setEnabled(False); self._finalizing = True
+        try:
+            self._finalize_session()
+        except Exception as e: # Otherwise the window would stay in the finalizing state and refuse to close
+            logger.critical("Unexpected error while finalizing session %s: %s", self.current_session_id, e, exc_info=True)
+            self._abort_finalization()
+            self.status_label.setText("Eden Recorder: Error while finalizing the session. See the application log.")
+            self.record_button.setEnabled(True)
+        finally:
+            self._finalizing = False; self.view_metadata_button.setEnabled(True)
+
+    def _abort_finalization(self):
+        """Closes what a failed _finalize_session left open, so nothing of the session carries over to the next one."""
+        try:
+            self._wait_for_pool(QThreadPool.globalInstance()) # Tasks still running may log to the session audit log
+            if self.audit_logger: self.audit_logger.flush_batch(); self.audit_logger.finalize_encryption()
+            self._reset_session_specific_vars()
+        except Exception as e: logger.critical("Session cleanup after a finalization error failed: %s", e, exc_info=True)
+
+    def _finalize_session(self):
+        """Body of _on_stop_button_clicked: saves, encrypts and summarizes the session, then resets the UI."""
         self.session_stop_timestamp = datetime.now(timezone.utc)
+        self.status_label.setText("Eden Recorder: Finalizing session...")
+        # Session audit events raised while finalizing are buffered and appended in one write
+        # just before the session audit log is encrypted.
+        if self.audit_logger: self.audit_logger.begin_batch()
+        # Finalization steps that don't depend on each other (or on the AI training consent answers) run here,
+        # so they overlap one another and the time the user spends in the consent dialog.
+        finalization_pool = QThreadPool.globalInstance()
 
         if self.audio_recorder and self.audio_recorder.is_recording:
             logger.info("Stopping audio recorder.")
             raw_audio_path = self.audio_recorder.output_filepath
-            self.audio_recorder.stop_recording() # Assuming this can't fail or has own error handling
-            logger.info(f"Audio recording stopped. Raw audio at: {raw_audio_path}")
+            self.audio_recorder.stop_recording(save=False) # Saved by _save_raw_audio on the pool
+            logger.info("Audio recording stopped. Raw audio at: %s", raw_audio_path)
             if self.audit_logger: self.audit_logger.log_action("AUDIO_RECORDING_STOPPED", {"path": raw_audio_path})
 
-            if self.master_key and self.current_session_key and os.path.exists(raw_audio_path):
-                encrypted_audio_path = os.path.join(self.current_session_encrypted_dir, "raw_session_audio.wav.enc")
-                try:
-                    encrypt_file(raw_audio_path, self.current_session_key, encrypted_audio_path)
-                    logger.info(f"Raw audio encrypted to: {encrypted_audio_path}")
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "raw_audio", "path": encrypted_audio_path})
-                except (IOError, OSError, FileNotFoundError) as e: # encrypt_file can raise FileNotFoundError
-                    logger.error(f"I/O error encrypting raw audio file '{raw_audio_path}': {e}", exc_info=True)
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_IO_FAILED", {"type": "raw_audio", "error": str(e)})
-                except ValueError as e: # From encryption
-                    logger.error(f"Value error encrypting raw audio file '{raw_audio_path}': {e}", exc_info=True)
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_VALUE_ERROR", {"type": "raw_audio", "error": str(e)})
-                except Exception as e: # Fallback
-                    logger.error(f"Unexpected error encrypting raw audio file '{raw_audio_path}': {e}", exc_info=True)
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTION_FAILED", {"type": "raw_audio", "error": str(e)})
-            elif self.master_key is None:
-                 logger.warning("Master key not set. Skipping encryption of raw audio.")
+            # The largest artifact; written (and encrypted) on the pool alongside the other finalization steps.
+            finalization_pool.start(SaveEncryptTask("raw_audio", self._save_raw_audio, raw_audio_path))
+            if self.master_key is None: logger.warning("Master key not set. Skipping encryption of raw audio.")
         else:
             logger.warning("Audio recorder not active or already stopped.")
 
@@ -433,158 +728,129 @@ class MainApp(QWidget):
         if self.diarization_update_timer.isActive(): self.diarization_update_timer.stop()
         if self.text_processing_timer.isActive(): self.text_processing_timer.stop()
         if self.emotion_update_timer.isActive(): self.emotion_update_timer.stop()
+        if self.vu_update_timer.isActive(): self.vu_update_timer.stop()
         if self.live_diarizer: self.live_diarizer.stop_diarization(); logger.debug("Live diarizer stopped.")
         if self.live_transcriber: self.live_transcriber.stop_transcription(); logger.debug("Live transcriber stopped.")
         if self.speech_emotion_recognizer: self.speech_emotion_recognizer.stop_recognition(); logger.debug("Speech emotion recognizer stopped.")
-        if self.transcript_widget: self.transcript_widget.stop_updates(); logger.debug("Transcript widget updates stopped.")
+        if self.transcript_widget: self.transcript_widget.timer.stop(); logger.debug("Transcript widget updates stopped.")
         if self.vu_meter: self.vu_meter.timer.stop(); logger.debug("VU meter timer stopped.")
+        if self.text_redactor: logger.info("Redaction cache stats: %s", self.text_redactor.get_cache_stats())
 
-        self._save_and_encrypt_voice_embeddings() # Already updated with specific exceptions
-
-        # Save transcripts (raw and redacted)
-        raw_transcript_path_standard = os.path.join(self.current_session_standard_dir, "full_transcript_raw.json")
-        try:
-            with open(raw_transcript_path_standard, 'w', encoding='utf-8') as f: json.dump(self.full_raw_transcript_segments, f, indent=4)
-            logger.info(f"Raw transcript saved to {raw_transcript_path_standard}")
-            if self.audit_logger: self.audit_logger.log_action("FILE_SAVED_STANDARD", {"type": "raw_transcript", "path": raw_transcript_path_standard})
-            if self.master_key and self.current_session_key:
-                raw_transcript_path_encrypted = os.path.join(self.current_session_encrypted_dir, "full_transcript_raw.json.enc")
-                encrypt_file(raw_transcript_path_standard, self.current_session_key, raw_transcript_path_encrypted)
-                logger.info(f"Raw transcript encrypted to {raw_transcript_path_encrypted}")
-                if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "raw_transcript", "path": raw_transcript_path_encrypted})
-            elif self.master_key is None: logger.warning("Master key not set. Skipping encryption of raw transcript.")
-        except (IOError, OSError) as e: logger.error(f"I/O error saving/encrypting raw transcript: {e}", exc_info=True)
-        except TypeError as e: logger.error(f"Type error saving raw transcript (data not JSON serializable?): {e}", exc_info=True)
-        except ValueError as e: logger.error(f"Value error during raw transcript encryption: {e}", exc_info=True) # From encrypt_file
-        except Exception as e: logger.error(f"Unexpected error saving/encrypting raw transcript: {e}", exc_info=True)
-
-        redacted_transcript_path_standard = os.path.join(self.current_session_standard_dir, "full_transcript_redacted.json")
-        try:
-            with open(redacted_transcript_path_standard, 'w', encoding='utf-8') as f: json.dump(self.full_redacted_transcript_segments, f, indent=4)
-            logger.info(f"Redacted transcript saved to {redacted_transcript_path_standard}")
-            if self.audit_logger: self.audit_logger.log_action("FILE_SAVED_STANDARD", {"type": "redacted_transcript", "path": redacted_transcript_path_standard})
-            if self.master_key and self.current_session_key:
-                redacted_transcript_path_encrypted = os.path.join(self.current_session_encrypted_dir, "full_transcript_redacted.json.enc")
-                encrypt_file(redacted_transcript_path_standard, self.current_session_key, redacted_transcript_path_encrypted)
-                logger.info(f"Redacted transcript encrypted to {redacted_transcript_path_encrypted}")
-                if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "redacted_transcript", "path": redacted_transcript_path_encrypted})
-            elif self.master_key is None: logger.warning("Master key not set. Skipping encryption of redacted transcript.")
-        except (IOError, OSError) as e: logger.error(f"I/O error saving/encrypting redacted transcript: {e}", exc_info=True)
-        except TypeError as e: logger.error(f"Type error saving redacted transcript: {e}", exc_info=True)
-        except ValueError as e: logger.error(f"Value error during redacted transcript encryption: {e}", exc_info=True)
-        except Exception as e: logger.error(f"Unexpected error saving/encrypting redacted transcript: {e}", exc_info=True)
+        self._save_and_encrypt_voice_embeddings(finalization_pool)
+        for kind, segments in (("raw_transcript", self.full_raw_transcript_segments),
+                               ("redacted_transcript", self.full_redacted_transcript_segments)):
+            finalization_pool.start(SaveEncryptTask(kind, self._persist_json_artifact, kind, segments))
 
         ai_consent_dialog = AITrainingConsentDialog(self.current_session_id, parent=self)
         ai_consent_dialog.exec_()
         self.ai_training_consents = ai_consent_dialog.get_consents()
-        logger.info(f"AI training consents obtained: {self.ai_training_consents}")
+        logger.info("AI training consents obtained: %s", self.ai_training_consents)
         if self.audit_logger: self.audit_logger.log_action("AI_TRAINING_CONSENT_OBTAINED", {"session_id": self.current_session_id, "consents": self.ai_training_consents})
 
+        # Metadata lists the files written above and the audit log must be complete before it is encrypted.
+        self._wait_for_pool(finalization_pool)
+        logger.debug("Background finalization tasks finished.")
+
         metadata_content = self._generate_metadata_dict()
         logger.info("Metadata dictionary generated for session stop (includes configuration).")
-        metadata_saved, metadata_encrypted = False, False
+        # The summary dialog's raw-metadata text is formatted on the pool while metadata and the audit log are finalized.
+        summary_render = {}
+        if metadata_content:
+            finalization_pool.start(SaveEncryptTask("summary_render", self._render_session_summary, metadata_content, summary_render))
         if self.current_session_standard_dir and metadata_content:
-            standard_metadata_path = os.path.join(self.current_session_standard_dir, "metadata.json")
-            try:
-                with open(standard_metadata_path, 'w', encoding='utf-8') as f: json.dump(metadata_content, f, indent=4)
-                logger.info(f"Metadata saved to {standard_metadata_path}"); metadata_saved = True
-                if self.audit_logger: self.audit_logger.log_action("FILE_SAVED_STANDARD", {"type": "metadata_json", "path": standard_metadata_path})
-
-                if self.master_key and self.current_session_key:
-                    encrypted_metadata_path = os.path.join(self.current_session_encrypted_dir, "metadata.json.enc")
-                    encrypt_file(standard_metadata_path, self.current_session_key, encrypted_metadata_path)
-                    logger.info(f"Encrypted metadata saved to {encrypted_metadata_path}"); metadata_encrypted = True
-                    if self.audit_logger: self.audit_logger.log_action("FILE_ENCRYPTED", {"type": "metadata_json", "path": encrypted_metadata_path})
-                elif self.master_key is None and metadata_saved: logger.warning("Master key not set. Skipping encryption of metadata.json.")
-            except (IOError, OSError) as e: logger.error(f"I/O error saving or encrypting metadata.json: {e}", exc_info=True)
-            except TypeError as e: logger.error(f"Type error saving metadata.json: {e}", exc_info=True)
-            except ValueError as e: logger.error(f"Value error encrypting metadata.json: {e}", exc_info=True) # From encrypt_file
-            except Exception as e: logger.critical(f"Unexpected critical error saving or encrypting metadata.json: {e}", exc_info=True) # Fallback
+            # configuration_used is swapped for its pre-encoded JSON; metadata_content stays a plain dict for the summary dialog.
+            self._persist_json_artifact("metadata_json", {**metadata_content, "configuration_used": _CONFIG_JSON})
         elif not metadata_content: logger.warning("Metadata content is empty. Skipping save for metadata.json.")
         elif not self.current_session_standard_dir: logger.error("Session standard directory not set. Cannot save metadata.json.")
 
         # Encrypt session audit log
-        if self.audit_logger and self.audit_logger.log_filepath and os.path.exists(self.audit_logger.log_filepath):
+        if self.audit_logger: self.audit_logger.flush_batch()
+        if self.audit_logger and self.audit_logger.finalize_encryption():
+            logger.info("Session audit log encrypted to: %s", self.current_session_paths['session_audit_log_encrypted'])
+        elif self.audit_logger and self.audit_logger.log_filepath: # No incremental copy: encrypt the finished log
             if self.master_key and self.current_session_key:
-                encrypted_audit_log_path = os.path.join(self.current_session_encrypted_dir, "session_audit_log.jsonl.enc")
+                encrypted_audit_log_path = self.current_session_paths["session_audit_log_encrypted"]
                 try:
                     encrypt_file(self.audit_logger.log_filepath, self.current_session_key, encrypted_audit_log_path)
-                    logger.info(f"Session audit log encrypted to: {encrypted_audit_log_path}")
-                except (IOError, OSError, FileNotFoundError) as e: logger.error(f"I/O error encrypting session audit log: {e}", exc_info=True)
-                except ValueError as e: logger.error(f"Value error encrypting session audit log: {e}", exc_info=True)
-                except Exception as e: logger.error(f"Unexpected error encrypting session audit log: {e}", exc_info=True)
+                    logger.info("Session audit log encrypted to: %s", encrypted_audit_log_path)
+                except FileNotFoundError: logger.warning("Session audit log '%s' not found. Skipping its encryption.", self.audit_logger.log_filepath)
+                except (IOError, OSError) as e: logger.error("I/O error encrypting session audit log: %s", e, exc_info=True)
+                except ValueError as e: logger.error("Value error encrypting session audit log: %s", e, exc_info=True)
+                except Exception as e: logger.error("Unexpected error encrypting session audit log: %s", e, exc_info=True)
             elif self.master_key is None: logger.warning("Master key not set. Skipping encryption of session audit log.")
 
-        # Save wrapped session key
-        if self.master_key and self.current_session_key:
-            wrapped_key_path = os.path.join(self.current_session_dir, "session_key.ek")
-            try:
-                wrapped_key = wrap_session_key(self.current_session_key, self.master_key)
-                with open(wrapped_key_path, 'wb') as f: f.write(wrapped_key) # Can raise IOError/OSError
-                logger.info(f"Wrapped session key saved to: {wrapped_key_path}")
-                if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPED_AND_SAVED", {"path": wrapped_key_path})
-            except (IOError, OSError) as e:
-                logger.error(f"I/O error wrapping and saving session key: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_IO_FAILED", {"error": str(e)})
-            except ValueError as e: # From wrap_session_key
-                logger.error(f"Value error wrapping session key: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_VALUE_ERROR", {"error": str(e)})
-            except Exception as e: # Fallback (e.g. cryptography exceptions if any)
-                logger.error(f"Unexpected error wrapping and saving session key: {e}", exc_info=True)
-                if self.audit_logger: self.audit_logger.log_action("SESSION_KEY_WRAPPING_FAILED", {"error": str(e)})
-
         if self.audit_logger: self.audit_logger.log_action("SESSION_STOP", {"session_id": self.current_session_id})
 
+        self._wait_for_pool(finalization_pool)
+        # Transcripts and voice prints are persisted and not shown in the summary: release them now rather than
+        # keeping them resident while the summary dialog is open.
+        _release_queue.put((self.full_raw_transcript_segments, self.full_redacted_transcript_segments, self.session_voice_prints))
+        self.full_raw_transcript_segments = []; self.full_redacted_transcript_segments = []; self.session_voice_prints = {}
         if metadata_content :
             logger.info("Displaying session summary dialog...")
-            summary_dialog = SessionSummaryDialog(metadata_dict=metadata_content, parent=self)
+            summary_dialog = SessionSummaryDialog(metadata_dict=metadata_content, parent=self, raw_metadata_text=summary_render.get("raw_metadata_text"))
             summary_dialog.exec_()
             if self.audit_logger: self.audit_logger.log_action("SESSION_SUMMARY_DISPLAYED", {"session_id": self.current_session_id})
             logger.info("Session summary dialog closed.")
         else: logger.warning("Metadata content was not available, not displaying session summary dialog.")
 
-        initial_status = "Eden Recorder: Ready to record. Click 'Record' to start."
-        if self.master_key is None: initial_status += " (Encryption DISABLED)"
-        else: initial_status += " (Encryption ENABLED)"
-        self.status_label.setText(initial_status)
+        self.status_label.setText(self._ready_status_text)
         self.record_button.setEnabled(True); self.stop_button.setEnabled(False)
         self.emotion_label.setText("Emotion: ---")
-        self.transcript_widget.clear_transcript()
+        self.transcript_widget.clear_text()
         self._reset_session_specific_vars()
         logger.info("Session cleanup and UI reset after stop.")
 
+    @staticmethod
+    def _wait_for_pool(pool):
+        """Waits for pool's tasks to finish while the window keeps repainting and handling input."""
+        while not pool.waitForDone(50): QApplication.processEvents()
+
     def _reset_session_specific_vars(self): # No direct I/O, internal state cleanup
         logger.debug("Resetting session specific variables.")
         # ... (content as before)
         self.current_session_id = None; self.current_session_dir = None
         self.current_session_standard_dir = None; self.current_session_encrypted_dir = None
+        if self.audit_logger: self.audit_logger.finalize_encryption(); self.audit_logger.close() # Also closes the encrypted copy of an aborted session
         self.current_session_key = None; self.audit_logger = None
+        self.current_session_paths = {}
         self.session_consent_status = None; self.session_consent_timestamp = None
         self.session_consent_expiry = None; self.session_stop_timestamp = None
-        self.full_raw_transcript_segments.clear(); self.full_redacted_transcript_segments.clear()
-        self.session_phi_pii_details.clear(); self.session_phi_pii_audio_mute_segments.clear()
-        self.session_emotion_annotations.clear(); self.ai_training_consents.clear()
-        self.session_voice_prints.clear(); self.session_voice_print_filepaths.clear()
+        # Rebind instead of clear(): the old containers are freed on the release thread, not here.
+        # Built inline so the queue holds the only reference to the tuple.
+        _release_queue.put((self.full_raw_transcript_segments, self.full_redacted_transcript_segments,
+                            self.session_phi_pii_details, self.session_phi_pii_audio_mute_segments,
+                            self.session_emotion_annotations, self.ai_training_consents,
+                            self.session_voice_prints, self.session_voice_print_filepaths))
+        self.full_raw_transcript_segments = []; self.full_redacted_transcript_segments = []
+        self.session_phi_pii_details = []; self.session_phi_pii_audio_mute_segments = []
+        self.session_emotion_annotations = []; self.ai_training_consents = {}
+        self.session_voice_prints = {}; self.session_voice_print_filepaths = {}
         if self.diarization_result_queue: self.diarization_result_queue = None
         if self.emotion_results_queue: self.emotion_results_queue = None
         logger.debug("Session variables reset.")
 
     def closeEvent(self, event): # No direct I/O, mostly state and timer management
         logger.info("Close event triggered for MainApp.")
+        if self._finalizing: # Closing from inside the stop handler's event processing would cut finalization short
+            logger.info("Session is being finalized; ignoring close request.")
+            event.ignore(); return
         # ... (content as before)
         if self.stop_button.isEnabled():
             logger.info("Stop button was enabled, calling _on_stop_button_clicked before closing.")
             self._on_stop_button_clicked()
 
-        if self.general_audit_logger: self.general_audit_logger.log_action("APP_SHUTDOWN")
+        if self.general_audit_logger: self.general_audit_logger.log_action("APP_SHUTDOWN"); self.general_audit_logger.close()
         else: logger.warning("General audit logger not available during shutdown.")
 
         logger.debug("Stopping timers.")
         if hasattr(self, 'diarization_update_timer') and self.diarization_update_timer.isActive(): self.diarization_update_timer.stop()
         if hasattr(self, 'text_processing_timer') and self.text_processing_timer.isActive(): self.text_processing_timer.stop()
         if hasattr(self, 'emotion_update_timer') and self.emotion_update_timer.isActive(): self.emotion_update_timer.stop()
+        if hasattr(self, 'vu_update_timer') and self.vu_update_timer.isActive(): self.vu_update_timer.stop()
         if hasattr(self, 'vu_meter') and self.vu_meter and self.vu_meter.timer.isActive(): self.vu_meter.timer.stop()
         if hasattr(self, 'transcript_widget') and self.transcript_widget and self.transcript_widget.timer.isActive(): self.transcript_widget.timer.stop()
+        if self.key_derivation_thread: self.key_derivation_thread.wait() # A QThread must not be destroyed while running
 
         logger.info("Application shutdown process complete. Accepting close event.")
         event.accept()
@@ -595,6 +861,7 @@ if __name__ == '__main__':
     try:
         main_window = MainApp()
         main_window.show()
+        threading.Thread(target=_prewarm_ml_modules, name="ml-prewarm", daemon=True).start()
         logger.info("Main window shown. Starting application event loop.")
         exit_code = app.exec_()
         logger.info(f"Application event loop finished with exit code: {exit_code}")
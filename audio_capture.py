@@ -1,43 +1,196 @@
 import sounddevice as sd
-import soundfile as sf
 import numpy as np
+import os
 import time
-import queue # Added for audio chunk queue
+import math
+import wave
+from datetime import datetime, timezone
+
+# Seconds of most-recent audio kept in the shared ring buffer read by the live consumers.
+RING_BUFFER_SECONDS = 30
+# Default window (in seconds) handed to each live consumer when no `out` buffer is supplied.
+DIARIZATION_WINDOW_SECONDS = 5
+TRANSCRIPTION_WINDOW_SECONDS = 2
+EMOTION_WINDOW_SECONDS = 2
+# Recorded audio is copied into preallocated slabs of this many seconds, so the audio callback
+# allocates once per slab rather than once per block.
+RECORDING_SLAB_SECONDS = 10
+# Fixed callback block length. A constant block size keeps the per-callback cost steady and makes
+# slabs fill in whole blocks; 20 ms is short enough for a responsive VU meter.
+BLOCK_SECONDS = 0.02
+
+def _mute_runs(mute_segments_time_list, samplerate, num_samples):
+    """
+    Converts (start_time, end_time) mute segments to disjoint sample ranges in one vectorized pass.
+    Segments are clamped to [0, num_samples], empty ones are dropped and overlapping or touching ones
+    are merged, so each sample is zeroed at most once.
+
+    :param mute_segments_time_list: A list of (start_time, end_time) tuples in seconds, in any order.
+    :param samplerate: Samples per second.
+    :param num_samples: Length of the audio being muted.
+    :return: Tuple (starts, ends) of int64 arrays; run i covers samples [starts[i], ends[i]).
+    """
+    bounds = (np.asarray(mute_segments_time_list, dtype=np.float64).reshape(-1, 2) * samplerate).astype(np.int64)
+    np.clip(bounds, 0, num_samples, out=bounds)
+    bounds = bounds[bounds[:, 0] < bounds[:, 1]] # Invalid or outside the audio after clamping
+    if len(bounds) == 0:
+        return bounds[:, 0], bounds[:, 1]
+    bounds = bounds[np.argsort(bounds[:, 0], kind='stable')]
+    ends = np.maximum.accumulate(bounds[:, 1]) # Furthest end reached by each segment and those before it
+    run_first = np.flatnonzero(np.r_[True, bounds[1:, 0] > ends[:-1]]) # Segments that start a new run
+    run_last = np.r_[run_first[1:] - 1, len(bounds) - 1]
+    return bounds[run_first, 0], ends[run_last]
+
+
+class _TeeStream:
+    """Write-only stream that forwards every write to a file and, optionally, to a second sink."""
+    def __init__(self, f_out, sink=None):
+        self.f_out = f_out
+        self.sink = sink
+
+    def write(self, data):
+        self.f_out.write(data)
+        if self.sink is not None:
+            self.sink.write(data)
+        return len(data)
+
+    def flush(self):
+        self.f_out.flush()
+
 
 class AudioRecorder:
-    def __init__(self):
+    def __init__(self, output_filepath="temp_full_audio.wav"):
+        self.output_filepath = output_filepath # Where stop_recording() saves the full audio by default
         self.frames = []
         self.stream = None
         self.samplerate = 44100  # Default samplerate
         self.channels = 1        # Default channels
+        self.blocksize = 0       # Frames per audio callback, set by start_recording
         self.is_recording = False
-        self.audio_chunk_queue = queue.Queue() # Queue for live audio data (RMS for VU meter)
-        self.transcription_audio_queue = queue.Queue() # Queue for raw audio chunks for transcription
+        self.start_time = None   # UTC datetime at which the current or last recording started
+        # VU meter state, owned by the thread polling latest_level (the GUI timer). The level is computed
+        # there from the ring buffer, so the audio callback only copies samples.
+        self._vu_level = 0.0
+        self._vu_position = 0 # Ring position (total frames) up to which the level has been computed
+        # Ring buffer holding the latest audio; consumers copy slices out of it instead of
+        # receiving a freshly allocated array per request. The audio thread is the only writer
+        # and publishes progress through _frames_written, so readers never take a lock.
+        self._ring = None
+        self._frames_written = 0 # Total frames recorded since start; head % ring length is the next ring row to write
+        self._slab = None  # Current recording slab; self.frames holds views into it
+        self._slab_pos = 0 # Next free frame in the slab
 
     def _audio_callback(self, indata, frame_count, time_info, status):
         """This is called (from a separate thread) for each audio block."""
         if status:
             print(f"Audio callback status: {status}", flush=True)
 
-        # Make a copy for safety, as indata buffer might be reused by PortAudio
-        current_chunk = indata.copy()
-
-        # Append raw data for saving the full audio file
+        # Copy out of indata, which PortAudio reuses, into the next free rows of the current slab
+        n = len(indata)
+        slab = self._slab
+        if slab is None or self._slab_pos + n > len(slab):
+            slab = self._slab = np.empty((max(self.samplerate * RECORDING_SLAB_SECONDS, n), self.channels), dtype=np.float32)
+            self._slab_pos = 0
+        current_chunk = slab[self._slab_pos:self._slab_pos + n]
+        np.copyto(current_chunk, indata)
+        self._slab_pos += n
+
+        # Append raw data for saving the full audio file (a view; it keeps its slab alive)
         self.frames.append(current_chunk)
 
-        # Calculate RMS of the current chunk and put it on the VU meter queue
-        try:
-            rms = np.sqrt(np.mean(current_chunk**2))
-            self.audio_chunk_queue.put(rms)
-        except Exception as e:
-            print(f"Error calculating RMS or putting to VU meter queue: {e}", flush=True)
+        # Copy into the ring buffer for the live consumers
+        if self._ring is not None:
+            self._write_to_ring(current_chunk)
+
+    def _write_to_ring(self, chunk):
+        """Writes a (frames, channels) block into the ring buffer, wrapping at the end."""
+        ring_len = self._ring.shape[0]
+        total = chunk.shape[0]
+        if total > ring_len: # Block larger than the ring: keep only its tail, where it would have landed
+            chunk = chunk[-ring_len:]
+        n = chunk.shape[0]
+        start = (self._frames_written + total - n) % ring_len
+        first = min(n, ring_len - start)
+        self._ring[start:start + first] = chunk[:first]
+        if first < n:
+            self._ring[:n - first] = chunk[first:]
+        # Published after the data so readers never see unwritten frames.
+        self._frames_written += total # Counts dropped frames too, so positions stay in recording time
+
+    def get_latest_chunk(self, num_frames, out=None):
+        """
+        Copies the most recent `num_frames` frames from the ring buffer.
 
-        # Put the raw audio chunk onto the transcription queue
-        try:
-            self.transcription_audio_queue.put(current_chunk)
-        except Exception as e:
-            print(f"Error putting to transcription queue: {e}", flush=True)
+        :param num_frames: Number of frames requested.
+        :param out: Optional preallocated float32 array of shape (num_frames, channels) to copy into.
+        :return: `out` (or a new array) holding the latest audio, or None if nothing has been recorded.
+        """
+        ring = self._ring
+        if ring is None:
+            return None
+        ring_len = ring.shape[0]
+        head = self._frames_written # Read once, like read_frames_since: every frame before head is in the ring
+        available = min(head, ring_len)
+        if available == 0:
+            return None
+        end = head % ring_len
+        n = min(num_frames, available)
+        if out is None:
+            out = np.empty((n, ring.shape[1]), dtype=np.float32)
+        elif out.shape[0] != n:
+            out = out[:n] # Not enough history yet: fill a prefix view of the caller's scratch
+        start = end - n
+        if start >= 0:
+            np.copyto(out, ring[start:end])
+        else: # Requested window wraps around the end of the ring
+            np.copyto(out[:-start], ring[start:])
+            np.copyto(out[-start:], ring[:end])
+        return out
+
+    def read_frames_since(self, position):
+        """
+        Copies the frames recorded after `position` out of the ring buffer, without locking.
+        For a streaming consumer that keeps its own read position across calls.
 
+        :param position: Position returned by the previous call; 0 after start_recording().
+        :return: Tuple (frames, new_position). frames is a new (n, channels) float32 array, or None if
+                 nothing new was recorded. A consumer more than RING_BUFFER_SECONDS behind loses the oldest frames.
+        """
+        ring = self._ring
+        if ring is None:
+            return None, position
+        ring_len = ring.shape[0]
+        head = self._frames_written # Read once: every frame before head is already in the ring
+        n = min(head - position, ring_len)
+        if n <= 0:
+            return None, position
+        end = head % ring_len
+        start = end - n
+        out = np.empty((n, ring.shape[1]), dtype=np.float32)
+        if start >= 0:
+            np.copyto(out, ring[start:end])
+        else: # Wraps around the end of the ring
+            np.copyto(out[:-start], ring[start:])
+            np.copyto(out[-start:], ring[:end])
+        return out, head
+
+    def _get_latest_chunk_for(self, window_seconds, out):
+        # Consumers keep the chunks they are given (the transcriber accumulates them), so a new array is
+        # returned unless the caller passes its own scratch buffer as `out`.
+        num_frames = out.shape[0] if out is not None else int(self.samplerate * window_seconds)
+        return self.get_latest_chunk(num_frames, out=out)
+
+    def get_latest_chunk_for_diarization(self, out=None):
+        """Latest audio window for the diarizer, as a new array unless `out` is given (see get_latest_chunk)."""
+        return self._get_latest_chunk_for(DIARIZATION_WINDOW_SECONDS, out)
+
+    def get_latest_chunk_for_transcription(self, out=None):
+        """Latest audio window for the transcriber, as a new array unless `out` is given (see get_latest_chunk)."""
+        return self._get_latest_chunk_for(TRANSCRIPTION_WINDOW_SECONDS, out)
+
+    def get_latest_chunk_for_emotion(self, out=None):
+        """Latest audio window for emotion recognition, as a new array unless `out` is given (see get_latest_chunk)."""
+        return self._get_latest_chunk_for(EMOTION_WINDOW_SECONDS, out)
 
     def start_recording(self, channels=1, samplerate=44100):
         if self.is_recording:
@@ -46,39 +199,43 @@ class AudioRecorder:
 
         self.channels = channels
         self.samplerate = samplerate
+        self.blocksize = int(self.samplerate * BLOCK_SECONDS)
         self.frames = []  # Clear previous frames
+        self._slab = None
+        self._slab_pos = 0
+        self._ring = np.zeros((self.samplerate * RING_BUFFER_SECONDS, self.channels), dtype=np.float32)
+        self._frames_written = 0
+        self._vu_position = 0
 
         try:
             # Query devices and select a default input device if available
             # print(sd.query_devices()) # Useful for debugging device issues
-            # Consider blocksize for InputStream for more controlled chunk sizes if needed
-            # For example, blocksize=int(samplerate * 0.1) # 100ms chunks
             self.stream = sd.InputStream(
                 samplerate=self.samplerate,
                 channels=self.channels,
+                dtype='float32', # Matches the ring buffer and the recording slabs
+                blocksize=self.blocksize, # See BLOCK_SECONDS
+                latency='low',
                 callback=self._audio_callback
                 # device=input_device # Can specify device if needed,
-                # blocksize= desired_block_size # can be set to control callback frequency/chunk size
             )
-            # Clear the queues before starting a new recording
-            while not self.audio_chunk_queue.empty():
-                try:
-                    self.audio_chunk_queue.get_nowait()
-                except queue.Empty:
-                    break
-            while not self.transcription_audio_queue.empty():
-                try:
-                    self.transcription_audio_queue.get_nowait()
-                except queue.Empty:
-                    break
+            # Reset the VU level before starting a new recording
+            self._vu_level = 0.0
             self.stream.start()
+            self.start_time = datetime.now(timezone.utc)
             self.is_recording = True
             print("Recording started...")
         except Exception as e:
             print(f"Error starting recording: {e}")
             self.is_recording = False # Ensure state is correct
 
-    def stop_recording(self, output_filename="temp_full_audio.wav"):
+    def stop_recording(self, output_filepath=None, save=True):
+        """
+        Stops the input stream and, by default, saves the recording.
+
+        :param output_filepath: Where to save the audio; defaults to self.output_filepath.
+        :param save: False to only stop the stream, e.g. to call save_recording() later from another thread.
+        """
         if not self.is_recording:
             print("Recording is not in progress or already stopped.")
             return
@@ -88,32 +245,112 @@ class AudioRecorder:
             self.stream.close()
             self.stream = None
         self.is_recording = False
+        self._vu_level = 0.0
         print("Recording stopped.")
 
-        if not self.frames:
-            print("No frames recorded.")
+        if not save:
             return
-
+        output_filepath = output_filepath or self.output_filepath
         try:
-            audio_data = np.concatenate(self.frames, axis=0)
-            sf.write(output_filepath, audio_data, self.samplerate) # Changed output_filename to output_filepath
-            print(f"Audio saved to {output_filepath}")
+            if self.save_recording(output_filepath):
+                print(f"Audio saved to {output_filepath}")
+            else:
+                print("No frames recorded.")
         except Exception as e:
             print(f"Error saving audio file: {e}")
 
-    def get_audio_chunk_queue(self):
-        """Returns the queue for accessing live audio RMS values (for VU meter)."""
-        return self.audio_chunk_queue
+    def save_recording(self, output_filepath=None, encrypted_sink=None):
+        """
+        Saves the finished recording as a 16-bit PCM WAV file.
+
+        :param output_filepath: Destination file; defaults to self.output_filepath.
+        :param encrypted_sink: Optional object with write(bytes) (e.g. encryption_utils.GCMFileWriter) that receives
+                               the same WAV bytes in the same pass, so the file is not read back to be encrypted.
+                               The caller closes it.
+        :return: True if audio was written, False if nothing was recorded.
+        :raises OSError: If the file cannot be written. Errors from encrypted_sink propagate as well.
+        """
+        if not self.frames:
+            return False
+        self._write_frames(output_filepath or self.output_filepath, encrypted_sink=encrypted_sink)
+        return True
 
-    def get_transcription_audio_queue(self):
-        """Returns the queue for accessing live raw audio chunks (for transcription)."""
-        return self.transcription_audio_queue
+    def _write_frames(self, output_filepath, run_starts=None, run_ends=None, encrypted_sink=None):
+        """
+        Streams the recorded blocks to a 16-bit PCM WAV file one at a time, so no full-session copy is built.
+        The frame count is known up front, so the header is written once and the file is never seeked back into;
+        this is what lets encrypted_sink receive the exact file bytes as they are produced.
+        The file is written next to output_filepath and renamed over it once complete, so a failure part-way never
+        leaves a truncated file whose header declares the full frame count.
+
+        :param output_filepath: Destination file.
+        :param run_starts: Optional sorted, disjoint run starts (in samples) from _mute_runs, written as silence.
+        :param run_ends: Run ends matching run_starts.
+        :param encrypted_sink: Optional object with write(bytes) receiving a copy of everything written to the file.
+        """
+        has_runs = run_starts is not None and len(run_starts) > 0
+        max_block = max(len(block) for block in self.frames)
+        scaled = np.empty((max_block, self.channels), dtype=np.float32) # Scratch reused for every block
+        pcm = np.empty((max_block, self.channels), dtype=np.int16)
+        tmp_filepath = output_filepath + ".tmp"
+        try:
+            with open(tmp_filepath, 'wb') as f_out:
+                with wave.open(_TeeStream(f_out, encrypted_sink), 'wb') as wav:
+                    wav.setnchannels(self.channels)
+                    wav.setsampwidth(2)
+                    wav.setframerate(self.samplerate)
+                    wav.setnframes(sum(len(block) for block in self.frames))
+                    offset = 0
+                    for block in self.frames:
+                        n = len(block)
+                        block_scaled, block_pcm = scaled[:n], pcm[:n]
+                        np.clip(block, -1.0, 1.0, out=block_scaled)
+                        block_scaled *= 32767.0
+                        np.rint(block_scaled, out=block_scaled)
+                        block_pcm[...] = block_scaled
+                        if has_runs: # Runs overlapping [offset, offset + n), found by binary search
+                            first = np.searchsorted(run_ends, offset, side='right')
+                            last = np.searchsorted(run_starts, offset + n, side='left')
+                            for start_sample, end_sample in zip(run_starts[first:last].tolist(), run_ends[first:last].tolist()):
+                                block_pcm[max(start_sample - offset, 0):min(end_sample - offset, n)] = 0
+                        wav.writeframesraw(block_pcm)
+                        offset += n
+            os.replace(tmp_filepath, output_filepath)
+        except BaseException:
+            if os.path.exists(tmp_filepath): os.remove(tmp_filepath) # Never leave a partial file behind
+            raise
+
+    @property
+    def latest_level(self):
+        """
+        RMS level of the audio recorded since the previous read (for the VU meter), or the previous
+        level if nothing new arrived. Computed from the ring buffer on the calling thread; meant for a
+        single poller such as the GUI timer.
+        """
+        ring = self._ring
+        if ring is None or not self.is_recording:
+            return 0.0
+        ring_len = ring.shape[0]
+        head = self._frames_written
+        n = min(head - self._vu_position, ring_len)
+        if n <= 0:
+            return self._vu_level
+        self._vu_position = head
+        end = head % ring_len
+        start = end - n
+        parts = (ring[start:end],) if start >= 0 else (ring[start:], ring[:end])
+        sum_squares = 0.0
+        for part in parts: # Contiguous rows, so ravel() is a view and np.dot a single SIMD reduction
+            flat = part.ravel()
+            sum_squares += float(np.dot(flat, flat))
+        self._vu_level = math.sqrt(sum_squares / (n * ring.shape[1]))
+        return self._vu_level
 
     def save_redacted_audio(self, output_filepath, mute_segments_time_list): # Changed output_filename to output_filepath
         """
         Saves a version of the recorded audio with specified segments muted.
 
-        :param output_filepath: Full filepath for the redacted audio.
+        :param output_filepath: Full filepath for the redacted audio (written as 16-bit PCM WAV).
         :param mute_segments_time_list: A list of (start_time, end_time) tuples in seconds.
         """
         if not self.frames:
@@ -126,30 +363,12 @@ class AudioRecorder:
             print("Samplerate is 0, cannot process audio for redaction.")
             return
 
-        print(f"Preparing to save redacted audio to {output_filename} with {len(mute_segments_time_list)} mute segments.")
+        print(f"Preparing to save redacted audio to {output_filepath} with {len(mute_segments_time_list)} mute segments.")
 
         try:
-            full_audio_data = np.concatenate(self.frames, axis=0)
-            redacted_audio_data = full_audio_data.copy()
-
-            for start_time, end_time in mute_segments_time_list:
-                start_sample = int(start_time * self.samplerate)
-                end_sample = int(end_time * self.samplerate)
-
-                # Boundary checks
-                if start_sample < 0: start_sample = 0
-                if end_sample > len(redacted_audio_data): end_sample = len(redacted_audio_data)
-                if start_sample >= end_sample: # If segment is invalid or outside bounds after clamping
-                    # print(f"Skipping invalid or out-of-bounds mute segment: ({start_time:.2f}s, {end_time:.2f}s)")
-                    continue
-
-                # print(f"Muting from {start_time:.2f}s ({start_sample}) to {end_time:.2f}s ({end_sample})")
-                if self.channels == 1:
-                    redacted_audio_data[start_sample:end_sample] = 0
-                else: # Stereo or multi-channel
-                    redacted_audio_data[start_sample:end_sample, :] = 0
-
-            sf.write(output_filename, redacted_audio_data, self.samplerate)
+            num_samples = sum(len(block) for block in self.frames)
+            run_starts, run_ends = _mute_runs(mute_segments_time_list, self.samplerate, num_samples)
+            self._write_frames(output_filepath, run_starts, run_ends)
             print(f"Redacted audio saved to {output_filepath}") # Changed output_filename to output_filepath
 
         except Exception as e:
@@ -164,8 +383,8 @@ if __name__ == '__main__':
 
     recorder = AudioRecorder()
 
-    # Test Case 1: Basic recording and queue check (conceptual)
-    print("\n--- Test Case: Start Recording (3 seconds), check queue conceptually ---")
+    # Test Case 1: Basic recording and ring buffer streaming check
+    print("\n--- Test Case: Start Recording (3 seconds), stream from the ring buffer ---")
     try:
         print("Available audio devices:", sd.query_devices())
     except Exception as e:
@@ -175,66 +394,47 @@ if __name__ == '__main__':
     recorder.start_recording(samplerate=44100, channels=1)
 
     if recorder.is_recording:
-        # In a real app, another thread or a QTimer would read from the queue.
-        # Here, we'll just simulate a short recording period and then check the queues.
+        # In a real app, another thread or a QTimer would read from the ring buffer.
+        # Here, we'll just simulate a short recording period and then check what was streamed.
         print("Simulating recording for 3 seconds...")
 
         live_rms_checks = 0
         live_transcription_checks = 0
+        stream_position = 0
+        total_samples = 0
 
         for i in range(15): # Try to read a few initial chunks (e.g., 15 * 0.2s = 3s)
             time.sleep(0.2) # Wait a bit for chunks to arrive
-            try:
-                rms_val = recorder.get_audio_chunk_queue().get_nowait()
-                # print(f"RMS from queue (live): {rms_val:.4f}")
+            if recorder.latest_level > 0:
+                # print(f"Latest RMS level (live): {recorder.latest_level:.4f}")
                 live_rms_checks +=1
-            except queue.Empty:
-                pass
-            try:
-                audio_chunk = recorder.get_transcription_audio_queue().get_nowait()
+            audio_chunk, stream_position = recorder.read_frames_since(stream_position)
+            if audio_chunk is not None:
                 # print(f"Audio chunk for transcription (live): shape {audio_chunk.shape}, dtype {audio_chunk.dtype}")
                 live_transcription_checks +=1
-            except queue.Empty:
-                pass
+                total_samples += len(audio_chunk)
 
-        print(f"Live checks: RMS queue got {live_rms_checks} items, Transcription queue got {live_transcription_checks} items.")
+        print(f"Live checks: RMS level was non-zero {live_rms_checks} times, ring buffer reads returned new audio {live_transcription_checks} times.")
 
         original_filepath = os.path.join(test_output_dir, "test_audio_3s_original.wav")
         recorder.stop_recording(output_filepath=original_filepath) # Use full path
 
         print("\n--- Post-recording checks & Redaction Test ---")
-        rms_q = recorder.get_audio_chunk_queue()
-        rms_count = 0
-        while not rms_q.empty():
-            try:
-                rms_q.get_nowait()
-                rms_count +=1
-            except queue.Empty:
-                break
-        print(f"Number of RMS values remaining in VU meter queue: {rms_count}")
-        if live_rms_checks == 0 and rms_count == 0 and recorder.frames:
-             print("Warning: Frames were recorded, but RMS (VU meter) queue is empty. Check callback logic.")
-
-        transcription_q = recorder.get_transcription_audio_queue()
-        transcription_count = 0
-        total_samples = 0
-        while not transcription_q.empty():
-            try:
-                chunk = transcription_q.get_nowait()
-                total_samples += len(chunk)
-                transcription_count +=1
-            except queue.Empty:
-                break
-        print(f"Number of raw audio chunks remaining in transcription queue: {transcription_count}")
-        print(f"Total audio samples in transcription queue (post-recording): {total_samples}")
-
-        if live_transcription_checks == 0 and transcription_count == 0 and recorder.frames:
-             print("Warning: Transcription queue was empty during/after recording. Check callback.")
+        if live_rms_checks == 0 and recorder.frames:
+             print("Warning: Frames were recorded, but the RMS (VU meter) level never updated. Check callback logic.")
+
+        remaining_chunk, stream_position = recorder.read_frames_since(stream_position)
+        if remaining_chunk is not None:
+            total_samples += len(remaining_chunk)
+        print(f"Total audio samples streamed from the ring buffer: {total_samples}")
+
+        if total_samples == 0 and recorder.frames:
+             print("Warning: No audio was streamed from the ring buffer during/after recording. Check callback.")
         elif recorder.frames:
             expected_total_samples = sum(len(f) for f in recorder.frames)
             print(f"Total samples in self.frames: {expected_total_samples}")
-            if total_samples != expected_total_samples and transcription_count > 0 : # If queue had items but not all
-                 print(f"Warning: Sample mismatch. Transcription queue had {total_samples}, self.frames had {expected_total_samples}")
+            if total_samples != expected_total_samples: # Streamed reads should cover every recorded frame
+                 print(f"Warning: Sample mismatch. Ring buffer reads returned {total_samples}, self.frames had {expected_total_samples}")
 
         # Test saving redacted audio
         if recorder.frames:
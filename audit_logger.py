@@ -1,7 +1,11 @@
+import dataclasses
 import datetime
+import enum
 import json
 import os
+import threading
 import logging # Added
+import json_utils
 
 # Get a logger instance for this module.
 # It will inherit the configuration from the root logger if app.py (or another entry point)
@@ -9,20 +13,54 @@ import logging # Added
 # this logger might not output as expected until logging is configured.
 module_logger = logging.getLogger(__name__)
 
+
+def _encode_detail_value(value):
+    """
+    Encoder fallback for detail values JSON has no type for, so callers can pass them as-is.
+    Only called for such values; plain data is encoded without calling back into Python.
+    Types orjson encodes natively (datetimes, enums, dataclasses, NumPy values) are converted to the same
+    JSON here, so entries read the same with the stdlib fallback; float32 values may differ in their last digits.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)} # Shallow; nested values come back here
+    if type(value).__module__ == "numpy" and hasattr(value, "tolist"): # Arrays and scalars, without importing NumPy here
+        return value.tolist()
+    return str(value) # Paths, UUIDs, exceptions, ...
+
 class AuditLogger:
-    def __init__(self, log_filepath: str):
+    def __init__(self, log_filepath: str, max_bytes: int = 0, backup_count: int = 5, actions=None):
         """
         Initializes the AuditLogger.
         :param log_filepath: Path to the audit log file.
+        :param max_bytes: Rotate the file before an append would grow it past this size; 0 disables rotation.
+                          Meant for long-lived logs; a log mirrored by attach_encrypted_sink should not rotate.
+        :param backup_count: Number of rotated files kept (log_filepath.1 is the newest); 0 disables rotation.
+        :param actions: Optional iterable of action types to record; other actions are dropped. None records every action.
         """
         self.log_filepath = log_filepath
+        self.enabled = True # Set to False to make log_action return immediately
+        self._allowed_actions = frozenset(actions) if actions is not None else None
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._write_lock = threading.Lock() # log_action may be called from worker threads
+        self._pending_lines = None # List of encoded lines while a batch is open, otherwise None
+        self._encrypted_sink = None # Optional writer receiving every appended line, see attach_encrypted_sink
+        # O_APPEND descriptor kept open between entries (one os.write() per entry instead of open/write/close).
+        # No Python file object in between, so every entry is in the file as soon as log_action returns.
+        self._fd = None
+        self._size = 0 # Current size of the log file, tracked so rotation needs no stat per append
         try:
             log_dir = os.path.dirname(self.log_filepath)
             if log_dir and not os.path.exists(log_dir):
                 os.makedirs(log_dir, exist_ok=True)
 
-            with open(self.log_filepath, 'a', encoding='utf-8') as f:
-                pass
+            self._open()
         except Exception as e:
             # Use the module_logger for this critical initialization error.
             module_logger.critical(f"AuditLogger failed to initialize log file at {self.log_filepath}: {e}", exc_info=True)
@@ -34,7 +72,10 @@ class AuditLogger:
         Logs an action with a timestamp and optional details.
         :param action_type: A string describing the type of action (e.g., "USER_LOGIN", "FILE_ENCRYPTED").
         :param details: A dictionary containing additional structured information about the event.
+                        Values may be datetimes (written as ISO 8601), bytes (written as hex) or other objects (written as str()).
         """
+        if not self.enabled or (self._allowed_actions is not None and action_type not in self._allowed_actions):
+            return # Checked before the timestamp and encoding, so a filtered call costs almost nothing
         log_entry = {} # Initialize in case of early failure
         try:
             timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
@@ -43,21 +84,147 @@ class AuditLogger:
                 "action": action_type
             }
             if details is not None and isinstance(details, dict):
-                # Create a new dictionary for the log entry to avoid modifying the original 'details'
-                # if it's passed around and used elsewhere.
-                current_entry_details = details.copy()
-                log_entry["details"] = current_entry_details # Store details under a 'details' key
+                log_entry["details"] = details # Store details under a 'details' key; encoded right away, never mutated
 
-            log_line = json.dumps(log_entry, ensure_ascii=False)
+            # Encoded straight to UTF-8 bytes (orjson when available). Values without a JSON type (datetimes, bytes,
+            # Paths, exceptions) are converted by _encode_detail_value instead of dropping the entry.
+            log_line = json_utils.dumps_compact(log_entry, default=_encode_detail_value) + b'\n'
 
-            with open(self.log_filepath, 'a', encoding='utf-8') as f:
-                f.write(log_line + '\n')
+            with self._write_lock:
+                if self._pending_lines is not None:
+                    self._pending_lines.append(log_line)
+                    return
+                self._append(log_line)
+                self._write_to_sink(log_line)
 
         except Exception as e:
             # Use the module_logger if writing to the audit file fails.
             # Include the log_entry that failed to be written.
             module_logger.error(f"Failed to write to audit log file {self.log_filepath}. Log Entry: {log_entry}. Error: {e}", exc_info=True)
 
+    def begin_batch(self):
+        """
+        Starts buffering log_action entries in memory instead of appending each one to the file.
+        The buffered entries are written, in order, by flush_batch().
+        """
+        with self._write_lock:
+            if self._pending_lines is None:
+                self._pending_lines = []
+
+    def flush_batch(self):
+        """
+        Appends all entries buffered since begin_batch() to the log file in a single write and
+        returns to writing each entry immediately. Does nothing if no batch is open.
+        """
+        with self._write_lock:
+            self._flush_pending()
+
+    def attach_encrypted_sink(self, sink):
+        """
+        Mirrors the log into sink (e.g. an encryption_utils.GCMFileWriter) from now on, so an encrypted
+        copy is built incrementally instead of by re-reading the whole file at the end of the session.
+        Entries already in the file are replayed into the sink first.
+        :param sink: Object with write(bytes) and close() methods.
+        """
+        with self._write_lock:
+            with open(self.log_filepath, 'rb') as f:
+                sink.write(f.read())
+            self._encrypted_sink = sink
+
+    def finalize_encryption(self) -> bool:
+        """
+        Closes the encrypted sink (for GCMFileWriter this writes the authentication tag) and detaches it.
+        Entries buffered by an open batch are flushed first, so they reach the sink; the batch ends.
+        Later entries go to the plaintext log only.
+        :return: True if a sink was attached and now holds every entry, False otherwise.
+        """
+        with self._write_lock:
+            self._flush_pending()
+            sink, self._encrypted_sink = self._encrypted_sink, None
+            if sink is None:
+                return False
+            try:
+                sink.close()
+                return True
+            except Exception as e:
+                module_logger.error(f"Failed to finalize encrypted copy of audit log {self.log_filepath}: {e}", exc_info=True)
+                return False
+
+    def close(self):
+        """
+        Syncs the log file to disk and closes the handle. A later log_action reopens it, so calling this
+        early only costs a reopen. Entries buffered by an open batch are flushed first and the batch ends.
+        """
+        with self._write_lock:
+            self._flush_pending()
+            self._close_file()
+
+    def _flush_pending(self):
+        # Called with _write_lock held.
+        pending_lines, self._pending_lines = self._pending_lines, None
+        if not pending_lines:
+            return
+        try:
+            data = b"".join(pending_lines)
+            self._append(data)
+            self._write_to_sink(data)
+        except Exception as e:
+            module_logger.error(f"Failed to flush {len(pending_lines)} batched entries to audit log file {self.log_filepath}. Error: {e}", exc_info=True)
+
+    def _open(self):
+        self._fd = os.open(self.log_filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        self._size = os.fstat(self._fd).st_size
+
+    def _close_file(self):
+        # Called with _write_lock held (or from __init__).
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            os.fsync(fd) # Once per file rather than per entry
+        except OSError as e:
+            module_logger.error(f"Failed to sync audit log file {self.log_filepath}: {e}", exc_info=True)
+        finally:
+            os.close(fd)
+
+    def _append(self, data: bytes):
+        # Called with _write_lock held. The lock still orders entries with batches, rotation and the
+        # encrypted sink; O_APPEND makes each write land at the current end of file.
+        if self._fd is None:
+            self._open()
+        if self.max_bytes > 0 and self.backup_count > 0 and self._size > 0 and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        view = memoryview(data)
+        while view: # os.write may write less than asked (large batches); finish the entry rather than truncate it
+            view = view[os.write(self._fd, view):]
+        self._size += len(data)
+
+    def _rotate(self):
+        # Called with _write_lock held. Same naming as logging.handlers.RotatingFileHandler:
+        # log_filepath.1 is the newest backup and log_filepath.<backup_count> the oldest kept.
+        self._close_file()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.log_filepath}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_filepath}.{i + 1}")
+        os.replace(self.log_filepath, f"{self.log_filepath}.1")
+        self._open()
+
+    def _write_to_sink(self, data: bytes):
+        # Called with _write_lock held. A failed sink is dropped so finalize_encryption reports it
+        # and the caller can fall back to encrypting the plaintext log.
+        if self._encrypted_sink is None:
+            return
+        try:
+            self._encrypted_sink.write(data)
+        except Exception as e:
+            module_logger.error(f"Failed to write to encrypted copy of audit log {self.log_filepath}: {e}", exc_info=True)
+            try:
+                self._encrypted_sink.close()
+            except Exception:
+                pass
+            self._encrypted_sink = None
+
 
 if __name__ == '__main__':
     # Basic logging configuration for standalone testing of audit_logger.py
@@ -88,6 +255,7 @@ if __name__ == '__main__':
     audit_trail_logger.log_action("RECORDING_STOPPED", {"session_id": "sess_test_001", "duration_seconds": 125.5})
     audit_trail_logger.log_action("APP_SHUTDOWN_TEST")
 
+    audit_trail_logger.close()
     module_logger.info(f"Test log actions written to '{test_log_filename}'.")
 
     try:
@@ -1,52 +1,99 @@
 import json
+import logging
 import os
+import json_utils
+
+# Config is loaded before app.py attaches its handlers, so until an application configures logging,
+# warnings and errors from here reach stderr through logging's last-resort handler and INFO is dropped.
+module_logger = logging.getLogger(__name__)
 
 CONFIG_FILE_PATH = "config.json"
 DEFAULT_CONFIG = {
     "sessions_output_dir": "sessions_output",
     "app_log_file": "logs/app.log",
-    "audit_log_dir": "logs"
+    "audit_log_dir": "logs",
+    "keep_plaintext_artifacts": False,
+    "transcript_format": "json",
+    "audit_log_max_bytes": 64 * 1024 * 1024
 }
 
-def load_or_create_config(config_path, defaults):
+def load_or_create_config(config_path, defaults, durable=False):
+    """
+    Loads config_path merged over defaults, writing the merged result back only if keys were missing.
+    The write goes to a temporary file that is renamed over config_path, so a crash mid-write never
+    leaves a truncated config behind. Set durable=True to also fsync before the rename.
+    """
     loaded_config = {}
     try:
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f: # Specify encoding
-                loaded_config = json.load(f)
+            with open(config_path, 'rb') as f: # Decoded as UTF-8 by json_utils.loads
+                loaded_config = json_utils.loads(f.read())
         else:
-            # Using print here as logger might not be configured yet,
-            # or could even depend on this config loading.
-            print(f"INFO: Configuration file '{config_path}' not found, creating with defaults.")
+            module_logger.info("Configuration file '%s' not found, creating with defaults.", config_path)
     except json.JSONDecodeError as e: # Specific exception for JSON parsing
-        print(f"WARNING: Error decoding JSON from '{config_path}': {e}. Using defaults and attempting to overwrite.")
+        module_logger.warning("Error decoding JSON from '%s': %s. Using defaults and attempting to overwrite.", config_path, e)
         loaded_config = {}
     except (IOError, OSError) as e: # Specific for file I/O issues
-        print(f"WARNING: File I/O error loading config '{config_path}': {e}. Using defaults.")
+        module_logger.warning("File I/O error loading config '%s': %s. Using defaults.", config_path, e)
         loaded_config = {}
     except Exception as e: # General fallback
-        print(f"WARNING: An unexpected error occurred loading config '{config_path}': {e}. Using defaults.")
+        module_logger.warning("An unexpected error occurred loading config '%s': %s. Using defaults.", config_path, e)
         loaded_config = {}
 
     config_to_save = defaults.copy()
     config_to_save.update(loaded_config) # loaded_config values overwrite default values if keys match
+    if config_to_save == loaded_config:
+        return config_to_save # File is present and complete: nothing to write
 
     try:
         config_dir = os.path.dirname(config_path)
         if config_dir and not os.path.exists(config_dir): # Ensure directory for config file exists
             os.makedirs(config_dir, exist_ok=True)
 
-        with open(config_path, 'w', encoding='utf-8') as f: # Specify encoding
-            json.dump(config_to_save, f, indent=4)
+        data = json_utils.dumps_pretty(config_to_save) # UTF-8 bytes; serialized before the file is touched
+        tmp_path = config_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, config_path) # Atomic, so readers see either the old or the new file
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
     except (IOError, OSError) as e: # Specific for file I/O issues
-        print(f"CRITICAL: Could not write configuration file to '{config_path}' due to I/O error: {e}")
+        module_logger.critical("Could not write configuration file to '%s' due to I/O error: %s", config_path, e)
         # Fallback to in-memory defaults if write fails, app might still be partially functional
         return defaults
-    except TypeError as e: # Specific for json.dump if config_to_save is not serializable
-        print(f"CRITICAL: Could not serialize configuration to JSON for '{config_path}': {e}")
+    except TypeError as e: # Specific for dumps_pretty if config_to_save is not serializable
+        module_logger.critical("Could not serialize configuration to JSON for '%s': %s", config_path, e)
         return defaults
     except Exception as e: # General fallback
-        print(f"CRITICAL: An unexpected error occurred writing configuration to '{config_path}': {e}")
+        module_logger.critical("An unexpected error occurred writing configuration to '%s': %s", config_path, e)
         return defaults
 
     return config_to_save
+
+
+def ensure_dirs(config):
+    """
+    Creates every long-lived directory named by the configuration (sessions output, audit logs,
+    and the application log's parent) in one place at startup, so later code can assume they exist.
+    Returns True if all directories exist afterwards.
+    """
+    app_log_dir = os.path.dirname(config.get("app_log_file", DEFAULT_CONFIG["app_log_file"]))
+    required_dirs = [
+        config.get("sessions_output_dir", DEFAULT_CONFIG["sessions_output_dir"]),
+        config.get("audit_log_dir", DEFAULT_CONFIG["audit_log_dir"]),
+        app_log_dir,
+    ]
+    all_ok = True
+    for dir_path in dict.fromkeys(d for d in required_dirs if d): # De-duplicate, keep order
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+        except OSError as e:
+            # Runs before app.py's handlers exist (the log directory is one of these); see module_logger.
+            module_logger.critical("Could not create directory '%s': %s", dir_path, e)
+            all_ok = False
+    return all_ok
@@ -0,0 +1,59 @@
+import struct
+
+import numpy as np
+
+# Voice embedding file format (.emb)
+# Embeddings are small 1-D vectors, so they are stored as raw little-endian values behind a
+# fixed 8-byte header (dtype code, format version, dimension) instead of a full .npy header.
+# New files are int8 with one float32 scale per vector (value = q * scale): a quarter of the
+# float32 size, with negligible effect on cosine distance. float16 files are still readable.
+# The layout is documented in the README for consumers outside this application.
+EMBEDDING_FILE_EXTENSION = ".emb"
+_EMBEDDING_HEADER = struct.Struct("<BB2xI")
+_EMBEDDING_SCALE = struct.Struct("<f") # Follows the header in int8 files
+_EMBEDDING_FORMAT_VERSION = 1
+DTYPE_FP16 = 1
+DTYPE_INT8 = 2
+_EMBEDDING_DTYPES = {DTYPE_FP16: np.dtype("<f2"), DTYPE_INT8: np.dtype("i1")}
+EMBEDDING_DTYPE_NAMES = {DTYPE_FP16: "float16", DTYPE_INT8: "int8"}
+
+
+def write_embedding(fd, arr):
+    """
+    Writes a voice embedding to a binary file-like object as header + scale + symmetric int8 values.
+    :param fd: Binary file-like object with write(), e.g. an open file or io.BytesIO.
+    :param arr: 1-D array-like of floats; other shapes are flattened.
+    """
+    arr = np.asarray(arr, dtype=np.float32).ravel()
+    max_abs = float(np.max(np.abs(arr))) if arr.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0 # An all-zero vector quantizes to zeros with any scale
+    fd.write(_EMBEDDING_HEADER.pack(DTYPE_INT8, _EMBEDDING_FORMAT_VERSION, arr.shape[0]))
+    fd.write(_EMBEDDING_SCALE.pack(scale))
+    fd.write(np.round(arr / scale).astype(np.int8).tobytes()) # tofile() needs a real fd
+
+
+def read_embedding(fd):
+    """
+    Reads a voice embedding written by write_embedding (int8) or by earlier versions (float16).
+    :param fd: Binary file-like object positioned at the start of the embedding.
+    :return: 1-D float32 array.
+    :raises ValueError: If the file is truncated, has an unknown dtype or version, or its length does not match the header.
+    """
+    header = fd.read(_EMBEDDING_HEADER.size)
+    if len(header) != _EMBEDDING_HEADER.size:
+        raise ValueError("Embedding file is too short to contain a header.")
+    dtype_code, version, dim = _EMBEDDING_HEADER.unpack(header)
+    if dtype_code not in _EMBEDDING_DTYPES or version != _EMBEDDING_FORMAT_VERSION:
+        raise ValueError(f"Unsupported embedding file (dtype code {dtype_code}, version {version}).")
+    scale = 1.0
+    if dtype_code == DTYPE_INT8:
+        scale_bytes = fd.read(_EMBEDDING_SCALE.size)
+        if len(scale_bytes) != _EMBEDDING_SCALE.size:
+            raise ValueError("Embedding file is too short to contain its scale.")
+        (scale,) = _EMBEDDING_SCALE.unpack(scale_bytes)
+    payload = fd.read()
+    itemsize = _EMBEDDING_DTYPES[dtype_code].itemsize
+    if len(payload) != dim * itemsize:
+        raise ValueError(f"Embedding file holds {len(payload)} payload bytes, header declares {dim} values of {itemsize} bytes.")
+    arr = np.frombuffer(payload, dtype=_EMBEDDING_DTYPES[dtype_code])
+    return arr.astype(np.float32) * np.float32(scale) if dtype_code == DTYPE_INT8 else arr.astype(np.float32)
@@ -1,5 +1,7 @@
 import os
+import mmap
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -9,6 +11,10 @@ from cryptography.hazmat.backends import default_backend
 # Hardcoding salt is not secure for general use but simplifies this example.
 SALT = b'_eden_recorder_fixed_salt_v1.0_'
 
+# encrypt_file and encrypt_bytes_to_file stream the plaintext through AES-GCM in chunks of this size.
+FILE_ENCRYPTION_CHUNK_SIZE = 1 << 20 # 1 MiB
+GCM_NONCE_SIZE = 12
+
 def generate_aes_key(key_size_bytes=32) -> bytes:
     """
     Generates a random AES key for AES-GCM.
@@ -59,29 +65,154 @@ def decrypt_data(encrypted_payload: bytes, key: bytes) -> bytes:
     decrypted_data = aesgcm.decrypt(nonce, encrypted_data, None) # associated_data=None
     return decrypted_data
 
+def _encrypt_view_to_file(src_view, key: bytes, f_out):
+    """
+    Writes nonce + AES-GCM ciphertext + tag for src_view to an open binary file.
+    The plaintext is encrypted in FILE_ENCRYPTION_CHUNK_SIZE slices into one reused output buffer,
+    so no ciphertext copy the size of the input is ever held in memory.
+    :param src_view: memoryview over the plaintext (bytes or an mmap).
+    :param key: AES key (as bytes), already validated by the caller.
+    :param f_out: File object opened for binary writing.
+    """
+    nonce = os.urandom(GCM_NONCE_SIZE)
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend()).encryptor()
+    f_out.write(nonce)
+    if len(src_view):
+        # update_into requires room for len(data) + block_size - 1 bytes
+        out_view = memoryview(bytearray(FILE_ENCRYPTION_CHUNK_SIZE + 15))
+        for offset in range(0, len(src_view), FILE_ENCRYPTION_CHUNK_SIZE):
+            n = encryptor.update_into(src_view[offset:offset + FILE_ENCRYPTION_CHUNK_SIZE], out_view)
+            f_out.write(out_view[:n])
+    encryptor.finalize()
+    f_out.write(encryptor.tag)
+
+def _drop_from_page_cache(fd: int):
+    """
+    Tells the kernel the file behind fd won't be read again, so its pages can be evicted instead of
+    pushing out hotter data (UI, audio buffers, model files). No-op where posix_fadvise is unavailable.
+    """
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass # Only a hint
+
+def encrypt_bytes_to_file(data_bytes: bytes, key: bytes, output_filepath: str):
+    """
+    Encrypts in-memory data using AES-GCM and writes the payload (nonce + ciphertext + tag) to a file.
+    Use this for artifacts that are already serialized in memory, so they are not written
+    out in plaintext and read back just to be encrypted. The ciphertext is streamed to a temporary
+    file in chunks, so peak memory stays at the plaintext plus a small buffer, and then renamed over
+    output_filepath, so the destination only ever holds a complete payload.
+    :param data_bytes: Data to encrypt (as bytes).
+    :param key: AES key (as bytes).
+    :param output_filepath: Path to save the encrypted file.
+    :raises ValueError: If data_bytes is not bytes or key is invalid.
+    """
+    if not isinstance(data_bytes, bytes):
+        raise ValueError("Data to encrypt must be bytes.")
+    if not key or len(key) not in [16, 24, 32]:
+        raise ValueError("Invalid AES key.")
+
+    tmp_filepath = output_filepath + ".tmp"
+    try:
+        with open(tmp_filepath, 'wb') as f_out:
+            _encrypt_view_to_file(memoryview(data_bytes), key, f_out)
+        os.replace(tmp_filepath, output_filepath)
+    except Exception as e:
+        print(f"Error during encryption to file: {e}")
+        # Don't leave a truncated ciphertext behind
+        if os.path.exists(tmp_filepath): os.remove(tmp_filepath)
+        raise
+
 def encrypt_file(input_filepath: str, key: bytes, output_filepath: str):
     """
     Encrypts a file using AES-GCM.
+    The input is memory-mapped and encrypted in FILE_ENCRYPTION_CHUNK_SIZE slices into a reused
+    output buffer, so large files (e.g. raw audio) are never copied whole into Python bytes objects.
+    The output layout (nonce + ciphertext + tag) matches encrypt_data, so decrypt_file reads it as before.
+    Afterwards the input's pages are dropped from the page cache (Linux), as it is read exactly once.
     :param input_filepath: Path to the file to encrypt.
     :param key: AES key (as bytes).
     :param output_filepath: Path to save the encrypted file.
     """
-    try:
-        with open(input_filepath, 'rb') as f_in:
-            file_content_bytes = f_in.read()
-
-        encrypted_payload = encrypt_data(file_content_bytes, key)
+    if not key or len(key) not in [16, 24, 32]:
+        raise ValueError("Invalid AES key.")
 
-        with open(output_filepath, 'wb') as f_out:
-            f_out.write(encrypted_payload)
+    try:
+        with open(input_filepath, 'rb') as f_in, open(output_filepath, 'wb') as f_out:
+            if os.fstat(f_in.fileno()).st_size: # mmap cannot map an empty file
+                with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    src_view = memoryview(mm)
+                    try:
+                        _encrypt_view_to_file(src_view, key, f_out)
+                    finally:
+                        src_view.release() # Must be released before the mmap can close
+            else:
+                _encrypt_view_to_file(memoryview(b""), key, f_out)
+            _drop_from_page_cache(f_in.fileno())
         # print(f"File '{input_filepath}' encrypted successfully to '{output_filepath}'.")
     except FileNotFoundError:
         print(f"Error: Input file not found at '{input_filepath}'.")
         raise
     except Exception as e:
         print(f"Error during file encryption: {e}")
+        # Don't leave a truncated ciphertext behind
+        if os.path.exists(output_filepath): os.remove(output_filepath)
         raise
 
+class GCMFileWriter:
+    """
+    Encrypts bytes with AES-GCM as they are appended, writing nonce + ciphertext to a file; close()
+    appends the tag. The finished file has the same layout as encrypt_file output, so decrypt_file reads it.
+    Used for artifacts that grow during a session (e.g. the session audit log), so they don't have to be
+    re-read and encrypted in one pass at the end.
+    """
+    def __init__(self, output_filepath: str, key: bytes):
+        """
+        :param output_filepath: Path of the encrypted file to create.
+        :param key: AES key (as bytes).
+        :raises ValueError: If key is invalid.
+        """
+        if not key or len(key) not in [16, 24, 32]:
+            raise ValueError("Invalid AES key.")
+        self.output_filepath = output_filepath
+        nonce = os.urandom(GCM_NONCE_SIZE)
+        self._encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend()).encryptor()
+        self._f_out = open(output_filepath, 'wb')
+        self._f_out.write(nonce)
+
+    def write(self, data: bytes):
+        """Encrypts data and appends the ciphertext to the file."""
+        self._f_out.write(self._encryptor.update(data))
+
+    def close(self):
+        """
+        Finalizes the GCM stream and writes the tag. Safe to call more than once.
+        If finalizing, writing the tag or closing the file fails, the file is deleted (see abort) and the error is re-raised.
+        """
+        if self._f_out is None:
+            return
+        try:
+            self._encryptor.finalize()
+            self._f_out.write(self._encryptor.tag)
+            self._f_out.close() # Flushes; a failure here also leaves the file without a complete tag
+        except BaseException:
+            self.abort()
+            raise
+        self._f_out = None
+
+    def abort(self):
+        """Closes the file without a tag and deletes it, so no unverifiable partial ciphertext is left behind."""
+        if self._f_out is None:
+            return
+        try:
+            self._f_out.close()
+        except OSError:
+            pass # The file is deleted regardless
+        self._f_out = None
+        if os.path.exists(self.output_filepath): os.remove(self.output_filepath)
+
 def decrypt_file(encrypted_filepath: str, key: bytes, output_filepath: str):
     """
     Decrypts a file using AES-GCM.
@@ -0,0 +1,73 @@
+import json
+
+# orjson is a C encoder that returns bytes directly and is several times faster than the stdlib
+# encoder on large lists of dicts (e.g. transcripts). It is optional: without it the stdlib json
+# module produces equivalent output.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_COMPACT_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_ORJSON_PRETTY_OPTIONS = (_ORJSON_COMPACT_OPTIONS | orjson.OPT_INDENT_2) if orjson else 0
+
+# Stdlib fallback: json.dumps builds a new JSONEncoder on every call with non-default arguments,
+# so compact encoders are built once per `default` callable and reused.
+_stdlib_compact_encoders = {}
+
+
+def _stdlib_compact_encoder(default):
+    encoder = _stdlib_compact_encoders.get(default)
+    if encoder is None:
+        encoder = _stdlib_compact_encoders[default] = json.JSONEncoder(
+            separators=(",", ":"), ensure_ascii=False, default=default).encode
+    return encoder
+
+
+def dumps_compact(obj, default=None) -> bytes:
+    """
+    Serializes obj to compact UTF-8 JSON bytes (no insignificant whitespace, non-ASCII kept as-is).
+    :param obj: JSON-serializable object. NumPy arrays/scalars are accepted when orjson is installed.
+    :param default: Optional callable returning a serializable replacement for objects the encoder does not support (e.g. str).
+    :return: Encoded JSON as bytes.
+    :raises TypeError: If obj is not serializable (orjson.JSONEncodeError is a TypeError subclass).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_COMPACT_OPTIONS)
+    return _stdlib_compact_encoder(default)(obj).encode("utf-8")
+
+
+def dumps_pretty(obj) -> bytes:
+    """
+    Serializes obj to UTF-8 JSON bytes indented by two spaces, for files people read (e.g. metadata.json).
+    :param obj: JSON-serializable object, optionally containing values returned by pre_encode().
+    :return: Encoded JSON as bytes.
+    :raises TypeError: If obj is not serializable.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_PRETTY_OPTIONS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    """
+    Parses JSON from bytes or str.
+    :param data: UTF-8 encoded bytes (as read in 'rb' mode) or str.
+    :return: The decoded object.
+    :raises json.JSONDecodeError: If data is not valid JSON (orjson.JSONDecodeError is a subclass).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def pre_encode(obj):
+    """
+    Encodes an object that does not change once so later dumps_* calls splice the cached bytes
+    instead of walking it again. The spliced value is written compactly, even inside dumps_pretty.
+    :param obj: JSON-serializable object that will not be mutated afterwards.
+    :return: An orjson.Fragment when the installed orjson supports it (3.9+), otherwise obj unchanged.
+    """
+    if orjson is not None and hasattr(orjson, "Fragment"):
+        return orjson.Fragment(orjson.dumps(obj, option=_ORJSON_COMPACT_OPTIONS))
+    return obj
@@ -6,6 +6,7 @@ import numpy as np
 import torch
 from pyannote.audio import Pipeline
 from pyannote.audio.features import Pretrained # For embedding model
+from queue_utils import drain_queue
 
 # Attempt to set a local cache for HuggingFace to avoid issues in restricted envs,
 # though pyannote might have its own model download logic.
@@ -148,9 +149,7 @@ class LiveDiarizer:
             return
 
         self.is_running = True
-        while not self.diarization_result_queue.empty(): # Clear queue
-            try: self.diarization_result_queue.get_nowait()
-            except queue.Empty: break
+        drain_queue(self.diarization_result_queue) # Clear queue
 
         self.diarization_thread = threading.Thread(target=self._diarization_loop)
         self.diarization_thread.daemon = True
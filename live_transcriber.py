@@ -4,6 +4,7 @@ import threading
 import time
 import numpy as np
 from faster_whisper import WhisperModel
+from queue_utils import drain_queue
 
 # Set HuggingFace cache directory to be local if needed
 # os.environ["HF_HOME"] = os.path.join(os.getcwd(), "models", "huggingface")
@@ -127,9 +128,7 @@ class LiveTranscriber:
         self.is_running = True
         self.current_audio_offset = 0.0 # Reset offset for a new session
         # Clear queue from previous run
-        while not self.transcribed_text_queue.empty():
-            try: self.transcribed_text_queue.get_nowait()
-            except queue.Empty: break
+        drain_queue(self.transcribed_text_queue)
 
         self.transcription_thread = threading.Thread(target=self._transcription_loop)
         self.transcription_thread.daemon = True
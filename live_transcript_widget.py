@@ -6,6 +6,7 @@ from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QScrollA
 from PyQt5.QtCore import QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QTextCursor, QColor, QPalette
 from PyQt5.QtWidgets import QTextEdit
+from queue_utils import drain_queue
 
 class LiveTranscriptWidget(QWidget):
     # Signal emitted when transcript is updated
@@ -84,8 +85,7 @@ class LiveTranscriptWidget(QWidget):
         if self.transcript_text_queue:
             new_text_added = False
             try:
-                while not self.transcript_text_queue.empty():
-                    text_segment = self.transcript_text_queue.get_nowait()
+                for text_segment in drain_queue(self.transcript_text_queue): # One lock acquisition per tick
                     
                     speaker = self.current_speaker_label if self.current_speaker_label else "Unknown"
                     timestamp = time.strftime("%H:%M:%S")
@@ -13,10 +13,17 @@ from PyQt5.QtGui import QFont, QIcon, QPalette, QColor
 class SessionSummaryDialog(QDialog):
     export_requested = pyqtSignal(str)  # Signal for export requests
     
-    def __init__(self, metadata_dict: dict, parent=None):
+    def __init__(self, metadata_dict: dict, parent=None, raw_metadata_text: str = None):
+        """
+        :param metadata_dict: Session metadata to display.
+        :param parent: Parent widget.
+        :param raw_metadata_text: Output of format_raw_metadata(metadata_dict) if the caller already
+                                  computed it (e.g. on a worker thread); computed here otherwise.
+        """
         super().__init__(parent)
         self.setWindowTitle("Session Summary & Metadata")
         self.metadata = metadata_dict
+        self._raw_metadata_text = raw_metadata_text
         self.setModal(True)
         
         # Main layout
@@ -272,15 +279,21 @@ class SessionSummaryDialog(QDialog):
         metadata_display.setReadOnly(True)
         metadata_display.setFont(QFont("Courier", 9))
         
-        try:
-            formatted_json = json.dumps(self.metadata, indent=2, sort_keys=True, default=str)
-            metadata_display.setText(formatted_json)
-        except Exception as e:
-            metadata_display.setText(f"Error formatting metadata: {e}\n\nRaw data:\n{str(self.metadata)}")
+        if self._raw_metadata_text is None:
+            self._raw_metadata_text = self.format_raw_metadata(self.metadata)
+        metadata_display.setText(self._raw_metadata_text)
         
         layout.addWidget(metadata_display)
         self.tab_widget.addTab(metadata_widget, "Raw Metadata")
 
+    @staticmethod
+    def format_raw_metadata(metadata_dict):
+        """Formats metadata for the Raw Metadata tab. Creates no widgets, so it can run off the GUI thread."""
+        try:
+            return json.dumps(metadata_dict, indent=2, sort_keys=True, default=str)
+        except Exception as e:
+            return f"Error formatting metadata: {e}\n\nRaw data:\n{str(metadata_dict)}"
+
     def _create_footer(self, layout):
         """Create footer with action buttons"""
         button_layout = QHBoxLayout()
@@ -6,6 +6,7 @@ import numpy as np
 import torch
 from transformers import pipeline as hf_pipeline
 from typing import Optional, Tuple, List, Dict, Any
+from queue_utils import drain_queue
 import logging
 
 # Configure logging
@@ -310,11 +311,7 @@ class SpeechEmotionRecognizer:
     @staticmethod
     def _clear_queue(q: queue.Queue) -> None:
         """Clear all items from a queue."""
-        while not q.empty():
-            try:
-                q.get_nowait()
-            except queue.Empty:
-                break
+        drain_queue(q)
 
 # Test and demo code
 if __name__ == '__main__':
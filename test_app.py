@@ -0,0 +1,125 @@
+import unittest
+import os
+import json
+import tempfile
+import importlib.util
+from unittest import mock
+
+from audit_logger import AuditLogger
+
+# app builds its configuration, log directories and log file at import, relative to the working directory,
+# so it is imported from inside a temporary directory in setUpModule.
+_HAS_PYQT5 = importlib.util.find_spec("PyQt5") is not None
+app = None
+_module_dir = None
+
+
+def setUpModule():
+    global app, _module_dir
+    if not _HAS_PYQT5:
+        return
+    _module_dir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    os.chdir(_module_dir.name)
+    try:
+        import app as app_module
+    finally:
+        os.chdir(cwd)
+    app = app_module
+
+
+def tearDownModule():
+    if _module_dir is not None:
+        _module_dir.cleanup()
+
+
+class _SyncPool:
+    """Stands in for QThreadPool: runs each task as it is started."""
+    def start(self, task): task.run()
+    def waitForDone(self, msecs=-1): return True
+
+
+@unittest.skipUnless(_HAS_PYQT5, "PyQt5 is not installed")
+class TestFinalizeSession(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.temp_dir.name, "session_audit.log")
+        self.audit_logger = AuditLogger(self.log_path)
+        self.window = self._make_window()
+        self.consent_dialog = mock.Mock()
+        self.consent_dialog.get_consents.return_value = {"training": False}
+        for name, value in (("QThreadPool", mock.Mock(globalInstance=mock.Mock(return_value=_SyncPool()))),
+                            ("AITrainingConsentDialog", mock.Mock(return_value=self.consent_dialog)),
+                            ("SessionSummaryDialog", mock.Mock())):
+            patcher = mock.patch.object(app, name, value)
+            patcher.start(); self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.audit_logger.close()
+        self.temp_dir.cleanup()
+
+    def _make_window(self):
+        # Only the state _finalize_session and _reset_session_specific_vars touch; the Qt widget itself is never initialized.
+        window = app.MainApp.__new__(app.MainApp)
+        window.audit_logger = self.audit_logger; window.master_key = None; window._finalizing = False
+        window.current_session_id = "session-1"; window.current_session_dir = None
+        window.current_session_standard_dir = None; window.current_session_encrypted_dir = None
+        window.current_session_key = None; window.current_session_paths = {}
+        window.session_consent_status = "agreed"; window.session_consent_timestamp = None
+        window.session_consent_expiry = None; window.session_stop_timestamp = None
+        window.full_raw_transcript_segments = [{"text": "raw"}]; window.full_redacted_transcript_segments = [{"text": "redacted"}]
+        window.session_phi_pii_details = [{"entity": "NAME"}]; window.session_phi_pii_audio_mute_segments = [(0.0, 1.0)]
+        window.session_emotion_annotations = [{"emotion": "neutral"}]; window.ai_training_consents = {}
+        window.session_voice_prints = {"SPEAKER_00": [0.0]}; window.session_voice_print_filepaths = {"SPEAKER_00": "vp.emb"}
+        window.diarization_result_queue = None; window.emotion_results_queue = None
+        window.audio_recorder = mock.Mock(is_recording=True, output_filepath="raw.wav")
+        window.live_diarizer = None; window.live_transcriber = None; window.speech_emotion_recognizer = None
+        window.text_redactor = None; window.vu_meter = None
+        window.transcript_widget = mock.Mock(spec=app.LiveTranscriptWidget); window.transcript_widget.timer = mock.Mock()
+        for timer in ("diarization_update_timer", "text_processing_timer", "emotion_update_timer", "vu_update_timer"):
+            setattr(window, timer, mock.Mock(**{"isActive.return_value": False}))
+        for widget in ("status_label", "record_button", "stop_button", "view_metadata_button", "emotion_label"):
+            setattr(window, widget, mock.Mock())
+        window._ready_status_text = "Ready"
+        window._save_raw_audio = mock.Mock(); window._save_and_encrypt_voice_embeddings = mock.Mock()
+        window._persist_json_artifact = mock.Mock(); window._generate_metadata_dict = mock.Mock(return_value={})
+        return window
+
+    def _read_actions(self):
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line)["action"] for line in f]
+
+    def _assert_session_reset(self):
+        window = self.window
+        self.assertIsNone(window.audit_logger)
+        self.assertIsNone(window.current_session_id)
+        self.assertEqual(window.session_phi_pii_details, [])
+        self.assertEqual(window.session_emotion_annotations, [])
+        self.assertEqual(window.session_voice_print_filepaths, {})
+        self.assertEqual(window.ai_training_consents, {})
+        self.assertFalse(window._finalizing)
+        window.record_button.setEnabled.assert_called_with(True)
+        window.view_metadata_button.setEnabled.assert_called_with(True)
+
+    def test_stop_resets_transcript_widget_and_session(self):
+        """A normal stop uses the widget's own API, writes the session audit log and resets all session state."""
+        self.window._on_stop_button_clicked()
+        self.window.transcript_widget.timer.stop.assert_called_once_with()
+        self.window.transcript_widget.clear_text.assert_called_once_with()
+        self.window._save_raw_audio.assert_called_once_with("raw.wav")
+        self.assertEqual(self._read_actions(), ["AUDIO_RECORDING_STOPPED", "AI_TRAINING_CONSENT_OBTAINED", "SESSION_STOP"])
+        self._assert_session_reset()
+
+    def test_failed_finalization_flushes_audit_batch_and_resets_session(self):
+        """An error part-way through still writes the buffered audit entries and leaves no session state behind."""
+        self.consent_dialog.exec_.side_effect = RuntimeError("dialog failed")
+        with self.assertLogs("app", level="CRITICAL"):
+            self.window._on_stop_button_clicked()
+        self.assertEqual(self._read_actions(), ["AUDIO_RECORDING_STOPPED"])
+        self._assert_session_reset()
+        self.window.status_label.setText.assert_called_with("Eden Recorder: Error while finalizing the session. See the application log.")
+
+
+if __name__ == '__main__':
+    unittest.main()
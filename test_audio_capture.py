@@ -0,0 +1,149 @@
+import unittest
+import os
+import tempfile
+import wave
+
+# sounddevice raises OSError on import when the PortAudio library is missing (e.g. on headless CI).
+try:
+    import numpy as np
+    from audio_capture import AudioRecorder, _mute_runs
+except (ImportError, OSError) as e:
+    AudioRecorder = None
+    _IMPORT_ERROR = str(e)
+else:
+    _IMPORT_ERROR = ""
+
+
+@unittest.skipIf(AudioRecorder is None, f"audio_capture unavailable: {_IMPORT_ERROR}")
+class TestRingBuffer(unittest.TestCase):
+
+    RING_FRAMES = 8
+
+    def setUp(self):
+        # Drives the audio callback directly, as the input stream would, with a small ring.
+        self.recorder = AudioRecorder()
+        self.recorder.samplerate = 4
+        self.recorder._ring = np.zeros((self.RING_FRAMES, 1), dtype=np.float32)
+        self.next_value = 0
+
+    def _record(self, num_frames):
+        block = np.arange(self.next_value, self.next_value + num_frames, dtype=np.float32).reshape(-1, 1)
+        self.next_value += num_frames
+        self.recorder._audio_callback(block, num_frames, None, None)
+
+    def test_latest_chunk_before_ring_is_full(self):
+        """Early in a session only the frames written so far are returned, never unwritten ring rows."""
+        self.assertIsNone(self.recorder.get_latest_chunk(5))
+        self._record(3)
+        np.testing.assert_array_equal(self.recorder.get_latest_chunk(5).ravel(), [0, 1, 2])
+        out = np.full((5, 1), -1.0, dtype=np.float32)
+        np.testing.assert_array_equal(self.recorder.get_latest_chunk(5, out=out).ravel(), [0, 1, 2])
+
+    def test_latest_chunk_wraps_around(self):
+        """After the ring wraps, the newest frames are returned in recording order."""
+        for _ in range(4):
+            self._record(3) # 12 frames through an 8-frame ring
+        np.testing.assert_array_equal(self.recorder.get_latest_chunk(5).ravel(), [7, 8, 9, 10, 11])
+        np.testing.assert_array_equal(self.recorder.get_latest_chunk(20).ravel(), np.arange(4, 12))
+
+    def test_consumer_chunks_are_not_overwritten_by_later_calls(self):
+        """Chunks handed to a consumer stay intact; only a caller-supplied `out` is reused."""
+        self._record(3)
+        first = self.recorder.get_latest_chunk_for_transcription()
+        self._record(3)
+        second = self.recorder.get_latest_chunk_for_transcription()
+        np.testing.assert_array_equal(first.ravel(), [0, 1, 2])
+        np.testing.assert_array_equal(second.ravel(), np.arange(6))
+        self.assertFalse(np.shares_memory(first, second))
+
+        out = np.zeros((2, 1), dtype=np.float32)
+        self.assertIs(self.recorder.get_latest_chunk_for_transcription(out=out), out)
+        np.testing.assert_array_equal(out.ravel(), [4, 5])
+
+    def test_read_frames_since_across_wrap(self):
+        """A streaming reader gets every frame once, across the wrap, and loses only what was overwritten."""
+        self._record(6)
+        frames, position = self.recorder.read_frames_since(0)
+        np.testing.assert_array_equal(frames.ravel(), np.arange(6))
+        self._record(5) # Wraps
+        frames, position = self.recorder.read_frames_since(position)
+        np.testing.assert_array_equal(frames.ravel(), np.arange(6, 11))
+        self.assertEqual(self.recorder.read_frames_since(position), (None, position))
+
+        self._record(10) # More than the ring holds: the oldest two frames are gone
+        frames, position = self.recorder.read_frames_since(position)
+        np.testing.assert_array_equal(frames.ravel(), np.arange(13, 21))
+        self.assertEqual(position, 21)
+
+
+
+@unittest.skipIf(AudioRecorder is None, f"audio_capture unavailable: {_IMPORT_ERROR}")
+class TestRedactedAudio(unittest.TestCase):
+
+    SAMPLERATE = 10
+    BLOCK_LENGTHS = (7, 5, 9) # Block boundaries at samples 7 and 12
+    # Overlapping (3-9 and 8-10), touching (10-12), clamped at both ends, one crossing a block boundary,
+    # and one empty segment
+    SEGMENTS = [(0.3, 0.9), (0.8, 1.0), (1.0, 1.2), (-1.0, 0.1), (1.9, 5.0), (1.5, 1.4)]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.recorder = AudioRecorder(os.path.join(self.temp_dir.name, "full.wav"))
+        self.recorder.samplerate = self.SAMPLERATE
+        self.recorder.channels = 2
+        rng = np.random.default_rng(0)
+        # Values beyond [-1, 1] exercise clipping
+        self.recorder.frames = [rng.uniform(-1.5, 1.5, (n, 2)).astype(np.float32) for n in self.BLOCK_LENGTHS]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read_wav(self, path):
+        with wave.open(path, 'rb') as wav:
+            self.assertEqual((wav.getnchannels(), wav.getsampwidth(), wav.getframerate()), (2, 2, self.SAMPLERATE))
+            return np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2').reshape(-1, 2)
+
+    def _reference(self, segments):
+        """What save_redacted_audio produced before streaming: concatenate, mute each segment, convert to PCM16."""
+        audio = np.concatenate(self.recorder.frames, axis=0)
+        for start_time, end_time in segments:
+            start_sample = max(int(start_time * self.SAMPLERATE), 0)
+            end_sample = min(int(end_time * self.SAMPLERATE), len(audio))
+            if start_sample < end_sample:
+                audio[start_sample:end_sample] = 0
+        return np.rint(np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+    def test_mute_runs_merges_and_clamps(self):
+        starts, ends = _mute_runs(self.SEGMENTS, self.SAMPLERATE, sum(self.BLOCK_LENGTHS))
+        self.assertEqual(list(zip(starts.tolist(), ends.tolist())), [(0, 1), (3, 12), (19, 21)])
+        starts, ends = _mute_runs([], self.SAMPLERATE, 10)
+        self.assertEqual((len(starts), len(ends)), (0, 0))
+
+    def test_redacted_audio_matches_concatenate_and_mute(self):
+        path = os.path.join(self.temp_dir.name, "redacted.wav")
+        self.recorder.save_redacted_audio(path, self.SEGMENTS)
+        pcm = self._read_wav(path)
+        np.testing.assert_array_equal(pcm, self._reference(self.SEGMENTS))
+        muted = np.r_[0:1, 3:12, 19:21] # Includes the run across the block boundary at sample 7
+        self.assertFalse(pcm[muted].any())
+        kept = np.setdiff1d(np.arange(len(pcm)), muted)
+        self.assertTrue(pcm[kept].all(axis=1).all()) # Random input: no kept sample is zero
+
+    def test_failed_save_leaves_no_partial_file(self):
+        """If writing fails part-way (here: the encrypted sink), neither the WAV nor its temporary file is left behind."""
+        class FailingSink:
+            def __init__(self): self.writes = 0
+            def write(self, data):
+                self.writes += 1
+                if self.writes > 2: raise OSError("disk full")
+        with self.assertRaises(OSError):
+            self.recorder.save_recording(encrypted_sink=FailingSink())
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_saved_recording_is_unmuted_pcm16(self):
+        self.assertTrue(self.recorder.save_recording())
+        np.testing.assert_array_equal(self._read_wav(self.recorder.output_filepath), self._reference([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
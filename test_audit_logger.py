@@ -0,0 +1,188 @@
+import unittest
+import os
+import json
+import tempfile
+import datetime
+import pathlib
+import dataclasses
+import enum
+from unittest import mock
+
+import numpy as np
+
+import json_utils
+
+from audit_logger import AuditLogger
+
+
+class TestAuditLoggerBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.temp_dir.name, "audit.jsonl")
+        self.audit_logger = AuditLogger(self.log_path)
+
+    def tearDown(self):
+        self.audit_logger.close()
+        self.temp_dir.cleanup()
+
+    def _read_actions(self):
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line)["action"] for line in f]
+
+    def test_batched_entries_written_on_flush_in_order(self):
+        """Entries logged during a batch only reach the file on flush_batch, in call order."""
+        self.audit_logger.log_action("BEFORE")
+        self.audit_logger.begin_batch()
+        self.audit_logger.log_action("FIRST", {"n": 1})
+        self.audit_logger.log_action("SECOND")
+        self.assertEqual(self._read_actions(), ["BEFORE"])
+
+        self.audit_logger.flush_batch()
+        self.assertEqual(self._read_actions(), ["BEFORE", "FIRST", "SECOND"])
+
+    def test_logging_is_immediate_after_flush(self):
+        """After flush_batch, log_action writes straight to the file again."""
+        self.audit_logger.begin_batch()
+        self.audit_logger.flush_batch()
+        self.audit_logger.log_action("AFTER")
+        self.assertEqual(self._read_actions(), ["AFTER"])
+
+    def test_non_json_detail_values_are_converted(self):
+        """datetimes, bytes and other objects in details are written in readable form rather than dropped."""
+        when = datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=datetime.timezone.utc)
+        self.audit_logger.log_action("TYPED", {"when": when, "digest": b"\x01\xab", "path": pathlib.PurePosixPath("a/b.wav")})
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            details = json.loads(f.readline())["details"]
+        self.assertEqual(details, {"when": "2024-05-06T07:08:09+00:00", "digest": "01ab", "path": "a/b.wav"})
+
+    def test_encoders_agree_on_enums_dataclasses_and_numpy(self):
+        """With or without orjson, these values are written as the same JSON (orjson encodes them natively)."""
+        class Mode(enum.Enum):
+            REPLACE = "replace"
+
+        @dataclasses.dataclass
+        class Span:
+            start: int
+            when: datetime.datetime
+
+        details = {"mode": Mode.REPLACE, "span": Span(3, datetime.datetime(2024, 5, 6, tzinfo=datetime.timezone.utc)),
+                   "matrix": np.arange(6, dtype=np.int64).reshape(2, 3), "score": np.float64(0.25), "count": np.int32(7)}
+        expected = {"mode": "replace", "span": {"start": 3, "when": "2024-05-06T00:00:00+00:00"},
+                    "matrix": [[0, 1, 2], [3, 4, 5]], "score": 0.25, "count": 7}
+        for orjson_module in (json_utils.orjson, None):
+            with mock.patch.object(json_utils, "orjson", orjson_module):
+                self.audit_logger.log_action("TYPED", details)
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            logged = [json.loads(line)["details"] for line in f]
+        self.assertEqual(logged, [expected, expected])
+
+    def test_rotation_keeps_every_entry_in_order(self):
+        """Past max_bytes the log rolls over to .1, .2, ...; no entry is lost or split across files."""
+        self.audit_logger.close()
+        self.audit_logger = AuditLogger(self.log_path, max_bytes=200, backup_count=10)
+        actions = [f"EVENT_{i}" for i in range(12)]
+        for action in actions:
+            self.audit_logger.log_action(action, {"session_id": "s1"})
+
+        paths = [f"{self.log_path}.{i}" for i in range(10, 0, -1) if os.path.exists(f"{self.log_path}.{i}")] + [self.log_path]
+        self.assertGreater(len(paths), 1)
+        logged = []
+        for path in paths: # Oldest backup first
+            self.assertLessEqual(os.path.getsize(path), 200)
+            with open(path, 'r', encoding='utf-8') as f:
+                logged.extend(json.loads(line)["action"] for line in f)
+        self.assertEqual(logged, actions)
+
+    def test_disabled_and_filtered_actions_are_not_written(self):
+        """enabled=False drops every entry; an actions filter keeps only the listed action types."""
+        self.audit_logger.enabled = False
+        self.audit_logger.log_action("DROPPED")
+        self.audit_logger.enabled = True
+        self.audit_logger.log_action("KEPT")
+        self.assertEqual(self._read_actions(), ["KEPT"])
+
+        self.audit_logger.close()
+        self.audit_logger = AuditLogger(self.log_path, actions={"KEPT"})
+        self.audit_logger.log_action("OTHER")
+        self.audit_logger.log_action("KEPT")
+        self.assertEqual(self._read_actions(), ["KEPT", "KEPT"])
+
+    def test_logging_after_close_reopens_file(self):
+        """close() releases the handle; a later entry is appended after the earlier ones."""
+        self.audit_logger.log_action("BEFORE_CLOSE")
+        self.audit_logger.close()
+        self.audit_logger.log_action("AFTER_CLOSE")
+        self.assertEqual(self._read_actions(), ["BEFORE_CLOSE", "AFTER_CLOSE"])
+
+    def test_close_writes_entries_of_an_open_batch(self):
+        """close() flushes a batch that was never flushed, and later entries are written immediately."""
+        self.audit_logger.begin_batch()
+        self.audit_logger.log_action("BATCHED")
+        self.audit_logger.close()
+        self.assertEqual(self._read_actions(), ["BATCHED"])
+        self.audit_logger.log_action("AFTER_CLOSE")
+        self.assertEqual(self._read_actions(), ["BATCHED", "AFTER_CLOSE"])
+
+
+class _RecordingSink:
+    """Stands in for encryption_utils.GCMFileWriter: keeps what it is given in memory."""
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+
+class TestAuditLoggerEncryptedSink(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.temp_dir.name, "audit.jsonl")
+        self.audit_logger = AuditLogger(self.log_path)
+
+    def tearDown(self):
+        self.audit_logger.close()
+        self.temp_dir.cleanup()
+
+    def _read_log_bytes(self):
+        with open(self.log_path, 'rb') as f:
+            return f.read()
+
+    def test_sink_mirrors_existing_direct_and_batched_entries(self):
+        """After finalize_encryption the sink holds exactly the bytes of the plaintext log."""
+        sink = _RecordingSink()
+        self.audit_logger.log_action("BEFORE_ATTACH")
+        self.audit_logger.attach_encrypted_sink(sink)
+        self.audit_logger.log_action("DIRECT", {"path": "a.wav"})
+        self.audit_logger.begin_batch()
+        self.audit_logger.log_action("BATCHED")
+        self.audit_logger.flush_batch()
+
+        self.assertTrue(self.audit_logger.finalize_encryption())
+        self.assertTrue(sink.closed)
+        self.assertEqual(sink.data, self._read_log_bytes())
+
+        self.audit_logger.log_action("AFTER_FINALIZE") # Plaintext only from here on
+        self.assertNotEqual(sink.data, self._read_log_bytes())
+
+    def test_finalize_writes_entries_of_an_open_batch_to_sink(self):
+        """Entries of a batch still open at finalize_encryption reach both the plaintext log and the sink."""
+        sink = _RecordingSink()
+        self.audit_logger.attach_encrypted_sink(sink)
+        self.audit_logger.begin_batch()
+        self.audit_logger.log_action("BATCHED")
+        self.assertTrue(self.audit_logger.finalize_encryption())
+        self.assertIn(b'"BATCHED"', sink.data)
+        self.assertEqual(sink.data, self._read_log_bytes())
+
+    def test_finalize_without_sink_returns_false(self):
+        self.assertFalse(self.audit_logger.finalize_encryption())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,14 @@
 import unittest
 import os
 import json
+import tempfile
+from unittest import mock
 
 # Add the directory containing app.py to sys.path if test_app.py is in a different directory
 # For this environment, assuming app.py is in the root or accessible.
 # If app.py is in a subdirectory, adjust path: e.g., sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app_directory')))
 
-from config_utils import load_or_create_config, DEFAULT_CONFIG, CONFIG_FILE_PATH as APP_CONFIG_FILE_PATH
+from config_utils import load_or_create_config, ensure_dirs, DEFAULT_CONFIG, CONFIG_FILE_PATH as APP_CONFIG_FILE_PATH
 
 # Use a specific test configuration file to avoid interfering with a real one.
 # We use a different name for tests than the actual CONFIG_FILE_PATH from config_utils
@@ -62,6 +64,47 @@ class TestConfigHandling(unittest.TestCase):
             file_content = json.load(f)
         self.assertEqual(file_content, expected_config, "File content was not updated with defaults.")
 
+    def test_complete_config_file_is_not_rewritten(self):
+        """A config file that already has every key is read but left byte-for-byte as it was."""
+        original_text = json.dumps(DEFAULT_CONFIG) # Not indented, unlike what load_or_create_config writes
+        with open(TEST_CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
+            f.write(original_text)
+
+        config = load_or_create_config(TEST_CONFIG_FILE_PATH, DEFAULT_CONFIG)
+
+        self.assertEqual(config, DEFAULT_CONFIG)
+        with open(TEST_CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), original_text)
+
+    def test_failed_write_leaves_existing_file_intact(self):
+        """If the rename fails after the temporary file is written, the old file is kept and the temporary file removed."""
+        original_text = json.dumps({"sessions_output_dir": "old_sessions"})
+        with open(TEST_CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
+            f.write(original_text)
+
+        def failing_replace(src, dst):
+            self.assertTrue(os.path.exists(src)) # The temporary file was written before the failure
+            raise OSError("rename failed")
+
+        with mock.patch("config_utils.os.replace", side_effect=failing_replace):
+            config = load_or_create_config(TEST_CONFIG_FILE_PATH, DEFAULT_CONFIG, durable=True)
+
+        self.assertIs(config, DEFAULT_CONFIG) # Falls back to the in-memory defaults
+        with open(TEST_CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), original_text)
+        self.assertFalse(os.path.exists(TEST_CONFIG_FILE_PATH + ".tmp"))
+
+    def test_unserializable_config_is_not_written(self):
+        """A serialization error is raised before any file is opened, so the old file is untouched."""
+        original_text = json.dumps({"sessions_output_dir": "old_sessions"})
+        with open(TEST_CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
+            f.write(original_text)
+
+        defaults = dict(DEFAULT_CONFIG, unserializable=object())
+        self.assertIs(load_or_create_config(TEST_CONFIG_FILE_PATH, defaults), defaults)
+        with open(TEST_CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), original_text)
+
     def test_load_corrupted_config_file(self):
         """Test loading a corrupted config file; it should revert to defaults and fix the file."""
         with open(TEST_CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
@@ -117,5 +160,37 @@ class TestConfigHandling(unittest.TestCase):
         self.assertEqual(file_content, DEFAULT_CONFIG, "File content for empty JSON object was not updated with defaults.")
 
 
+class TestEnsureDirs(unittest.TestCase):
+
+    def test_creates_all_configured_directories(self):
+        """All configured output/log directories are created, including nested ones."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                "sessions_output_dir": os.path.join(tmp_dir, "sessions"),
+                "app_log_file": os.path.join(tmp_dir, "app_logs", "nested", "app.log"),
+                "audit_log_dir": os.path.join(tmp_dir, "audit"),
+            }
+            self.assertTrue(ensure_dirs(config))
+            self.assertTrue(os.path.isdir(config["sessions_output_dir"]))
+            self.assertTrue(os.path.isdir(config["audit_log_dir"]))
+            self.assertTrue(os.path.isdir(os.path.dirname(config["app_log_file"])))
+            # Calling again on existing directories is a no-op
+            self.assertTrue(ensure_dirs(config))
+
+    def test_reports_failure_when_directory_cannot_be_created(self):
+        """A path blocked by an existing file is reported as a failure rather than raising."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blocking_file = os.path.join(tmp_dir, "not_a_dir")
+            with open(blocking_file, 'w', encoding='utf-8') as f:
+                f.write("x")
+            config = {
+                "sessions_output_dir": os.path.join(blocking_file, "sessions"),
+                "app_log_file": os.path.join(tmp_dir, "logs", "app.log"),
+                "audit_log_dir": os.path.join(tmp_dir, "logs"),
+            }
+            self.assertFalse(ensure_dirs(config))
+            self.assertTrue(os.path.isdir(os.path.join(tmp_dir, "logs")))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import io
+import struct
+
+import numpy as np
+
+from embedding_utils import read_embedding, write_embedding, DTYPE_FP16, DTYPE_INT8
+
+
+def _float16_file(values, dim=None):
+    """Builds a float16 .emb file as written by earlier versions: header, then the raw values."""
+    values = np.asarray(values, dtype="<f2")
+    header = struct.pack("<BB2xI", DTYPE_FP16, 1, len(values) if dim is None else dim)
+    return io.BytesIO(header + values.tobytes())
+
+
+class TestInt8RoundTrip(unittest.TestCase):
+
+    def _round_trip(self, values):
+        buf = io.BytesIO()
+        write_embedding(buf, values)
+        self.assertEqual(buf.getvalue()[0], DTYPE_INT8)
+        buf.seek(0)
+        return read_embedding(buf)
+
+    def test_values_within_half_a_quantization_step(self):
+        """Each element comes back within scale / 2 of the original, and cosine similarity is preserved."""
+        values = np.random.default_rng(0).standard_normal(256).astype(np.float32)
+        embedding = self._round_trip(values)
+        self.assertEqual(embedding.dtype, np.float32)
+        self.assertEqual(embedding.shape, values.shape)
+        scale = np.max(np.abs(values)) / 127.0
+        self.assertLessEqual(np.max(np.abs(embedding - values)), scale / 2 * 1.001)
+        cosine = np.dot(embedding, values) / (np.linalg.norm(embedding) * np.linalg.norm(values))
+        self.assertGreater(cosine, 0.9999)
+
+    def test_all_zero_vector(self):
+        """An all-zero vector has no scale to derive; it reads back as zeros, not NaN."""
+        embedding = self._round_trip(np.zeros(16, dtype=np.float32))
+        np.testing.assert_array_equal(embedding, np.zeros(16, dtype=np.float32))
+
+    def test_truncated_int8_file_raises_value_error(self):
+        """Cut inside the scale or inside the values, the file is rejected."""
+        buf = io.BytesIO()
+        write_embedding(buf, [0.5, -0.5, 0.25])
+        data = buf.getvalue()
+        self.assertRaises(ValueError, read_embedding, io.BytesIO(data[:10]))
+        self.assertRaises(ValueError, read_embedding, io.BytesIO(data[:-1]))
+
+
+class TestReadEmbedding(unittest.TestCase):
+
+    def test_reads_legacy_float16_file(self):
+        """float16 files from earlier versions read back as float32 with the stored values."""
+        values = np.array([0.5, -1.25, 0.0, 3.0], dtype=np.float16)
+        embedding = read_embedding(_float16_file(values))
+        self.assertEqual(embedding.dtype, np.float32)
+        np.testing.assert_array_equal(embedding, values.astype(np.float32))
+
+    def test_truncated_header_raises_value_error(self):
+        self.assertRaises(ValueError, read_embedding, io.BytesIO(b"\x01\x01\x00"))
+
+    def test_dimension_mismatch_raises_value_error(self):
+        """A payload shorter or longer than the header's dimension is rejected rather than misread."""
+        self.assertRaises(ValueError, read_embedding, _float16_file([0.5, 1.0], dim=3))
+        self.assertRaises(ValueError, read_embedding, _float16_file([0.5, 1.0, 2.0], dim=2))
+
+    def test_unknown_dtype_or_version_raises_value_error(self):
+        self.assertRaises(ValueError, read_embedding, io.BytesIO(struct.pack("<BB2xI", 9, 1, 0)))
+        self.assertRaises(ValueError, read_embedding, io.BytesIO(struct.pack("<BB2xI", DTYPE_FP16, 2, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
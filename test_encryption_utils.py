@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+
+from encryption_utils import (generate_aes_key, encrypt_bytes_to_file, encrypt_file, decrypt_file, encrypt_data,
+                              decrypt_data, GCMFileWriter, FILE_ENCRYPTION_CHUNK_SIZE)
+
+
+class TestEncryptedFileRoundTrip(unittest.TestCase):
+    """Every writer must produce nonce + ciphertext + tag, the layout decrypt_file and decrypt_data read."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.key = generate_aes_key()
+        self.encrypted_path = self._path("artifact.enc")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def _decrypt(self):
+        decrypted_path = self._path("decrypted")
+        decrypt_file(self.encrypted_path, self.key, decrypted_path)
+        with open(decrypted_path, 'rb') as f:
+            return f.read()
+
+    def test_encrypt_bytes_to_file(self):
+        data = os.urandom(FILE_ENCRYPTION_CHUNK_SIZE + 12345)
+        encrypt_bytes_to_file(data, self.key, self.encrypted_path)
+        self.assertEqual(self._decrypt(), data)
+        self.assertFalse(os.path.exists(self.encrypted_path + ".tmp"))
+
+    def test_encrypt_file_empty_and_larger_than_one_chunk(self):
+        for data in (b"", os.urandom(FILE_ENCRYPTION_CHUNK_SIZE * 2 + 7)):
+            plaintext_path = self._path("plain")
+            with open(plaintext_path, 'wb') as f:
+                f.write(data)
+            encrypt_file(plaintext_path, self.key, self.encrypted_path)
+            self.assertEqual(self._decrypt(), data)
+
+    def test_gcm_file_writer_with_several_writes(self):
+        parts = [b"first line\n", b"", os.urandom(FILE_ENCRYPTION_CHUNK_SIZE + 3), b"last"]
+        writer = GCMFileWriter(self.encrypted_path, self.key)
+        for part in parts:
+            writer.write(part)
+        writer.close()
+        writer.close() # Second close is a no-op
+        self.assertEqual(self._decrypt(), b"".join(parts))
+
+    def test_file_payload_matches_encrypt_data_layout(self):
+        """decrypt_data reads a file payload, and decrypt_file-style readers read encrypt_data output."""
+        encrypt_bytes_to_file(b"session key material", self.key, self.encrypted_path)
+        with open(self.encrypted_path, 'rb') as f:
+            self.assertEqual(decrypt_data(f.read(), self.key), b"session key material")
+        self.assertEqual(decrypt_data(encrypt_data(b"payload", self.key), self.key), b"payload")
+
+    def test_abort_removes_output_file(self):
+        writer = GCMFileWriter(self.encrypted_path, self.key)
+        writer.write(b"partial")
+        writer.abort()
+        self.assertFalse(os.path.exists(self.encrypted_path))
+        writer.abort() # Safe after the file is gone
+
+    def test_failed_close_removes_output_file(self):
+        """A file whose tag could not be written is deleted rather than left unverifiable."""
+        writer = GCMFileWriter(self.encrypted_path, self.key)
+        writer.write(b"partial")
+        writer._encryptor = mock.Mock(**{"finalize.side_effect": ValueError("finalize failed")})
+        self.assertRaises(ValueError, writer.close)
+        self.assertFalse(os.path.exists(self.encrypted_path))
+        writer.abort() # Nothing left to do
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import json
+from unittest import mock
+
+import json_utils
+
+
+class TestDumpsCompact(unittest.TestCase):
+
+    SAMPLE = [
+        {"speaker": "SPEAKER_00", "text": "Grüße café", "start": 0.5, "end": 1.25, "words": []},
+        {"speaker": "SPEAKER_01", "text": "ok", "start": 1.5, "end": 2.0, "words": [{"word": "ok", "probability": 0.9}]},
+    ]
+
+    def _assert_compact_roundtrip(self, encoded):
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json.loads(encoded.decode("utf-8")), self.SAMPLE)
+        self.assertNotIn(b", ", encoded)
+        self.assertNotIn(b": ", encoded)
+        self.assertIn("Grüße".encode("utf-8"), encoded) # Non-ASCII is not \\u-escaped
+
+    def test_default_encoder(self):
+        """Output is compact UTF-8 JSON that round-trips with the stdlib decoder."""
+        self._assert_compact_roundtrip(json_utils.dumps_compact(self.SAMPLE))
+
+    def test_stdlib_fallback_without_orjson(self):
+        """Without orjson the stdlib encoder produces the same document."""
+        with mock.patch.object(json_utils, "orjson", None):
+            self._assert_compact_roundtrip(json_utils.dumps_compact(self.SAMPLE))
+
+    def test_unserializable_raises_type_error(self):
+        """Both encoders report unsupported objects as TypeError."""
+        self.assertRaises(TypeError, json_utils.dumps_compact, {"bad": object()})
+        with mock.patch.object(json_utils, "orjson", None):
+            self.assertRaises(TypeError, json_utils.dumps_compact, {"bad": object()})
+
+    def test_default_replaces_unsupported_objects(self):
+        """With default=str both encoders write unsupported objects as their string form."""
+        class Marker:
+            def __str__(self): return "marker"
+        for orjson_module in (json_utils.orjson, None):
+            with mock.patch.object(json_utils, "orjson", orjson_module):
+                encoded = json_utils.dumps_compact({"value": Marker()}, default=str)
+            self.assertEqual(json.loads(encoded.decode("utf-8")), {"value": "marker"})
+
+
+
+class TestLoads(unittest.TestCase):
+
+    def test_loads_bytes_and_reports_invalid_json(self):
+        """Both decoders accept UTF-8 bytes and raise json.JSONDecodeError on malformed input."""
+        for orjson_module in (json_utils.orjson, None):
+            with mock.patch.object(json_utils, "orjson", orjson_module):
+                self.assertEqual(json_utils.loads('{"name": "café"}'.encode("utf-8")), {"name": "café"})
+                self.assertRaises(json.JSONDecodeError, json_utils.loads, b"not json {")
+
+
+class TestDumpsPretty(unittest.TestCase):
+
+    CONFIG = {"sessions_output_dir": "sessions_output", "keep_plaintext_artifacts": True}
+
+    def test_pretty_output_is_indented_and_roundtrips(self):
+        """Both encoders indent by two spaces and decode back to the same document."""
+        doc = {"session_id": "s1", "files": {"raw_audio_standard": "a.wav"}}
+        for orjson_module in (json_utils.orjson, None):
+            with mock.patch.object(json_utils, "orjson", orjson_module):
+                encoded = json_utils.dumps_pretty(doc)
+            self.assertIn(b'\n  "session_id"', encoded)
+            self.assertEqual(json.loads(encoded.decode("utf-8")), doc)
+
+    def test_pre_encoded_value_is_spliced(self):
+        """A pre_encode()d subtree serializes to the same data as the original object."""
+        doc = {"session_id": "s1", "configuration_used": json_utils.pre_encode(self.CONFIG)}
+        decoded = json.loads(json_utils.dumps_pretty(doc).decode("utf-8"))
+        self.assertEqual(decoded["configuration_used"], self.CONFIG)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import queue
+import threading
+
+from queue_utils import drain_queue
+
+
+class TestDrainQueue(unittest.TestCase):
+
+    def test_returns_items_in_fifo_order_and_empties_queue(self):
+        q = queue.Queue()
+        for i in range(5):
+            q.put(i)
+        self.assertEqual(drain_queue(q), [0, 1, 2, 3, 4])
+        self.assertTrue(q.empty())
+
+    def test_empty_queue_returns_empty_list(self):
+        self.assertEqual(drain_queue(queue.Queue()), [])
+
+    def test_wakes_blocked_producer_on_bounded_queue(self):
+        """A producer blocked on a full bounded queue can put again after a drain."""
+        q = queue.Queue(maxsize=1)
+        q.put("first")
+        producer = threading.Thread(target=q.put, args=("second",))
+        producer.start()
+        self.assertEqual(drain_queue(q), ["first"])
+        producer.join(timeout=2)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(q.get_nowait(), "second")
+
+
+if __name__ == '__main__':
+    unittest.main()
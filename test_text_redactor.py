@@ -0,0 +1,77 @@
+import unittest
+
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer import AnonymizerEngine
+
+from text_redactor import TextRedactor, RedactionMode
+
+
+class _NameAnalyzer:
+    """Analyzer that reports every "Alice" as a PERSON with a fixed score and counts its calls."""
+    def __init__(self, score=0.7):
+        self.score = score
+        self.calls = 0
+
+    def analyze(self, text, language, entities=None):
+        self.calls += 1
+        results, start = [], text.find("Alice")
+        while start >= 0:
+            results.append(RecognizerResult("PERSON", start, start + 5, self.score))
+            start = text.find("Alice", start + 5)
+        return results
+
+
+class TestRedactionCache(unittest.TestCase):
+
+    MODEL_NAME = "test_redaction_cache_model" # Engine cache key used only by these tests
+
+    def setUp(self):
+        # Seed the shared engine cache so no spaCy model is loaded; the cache logic is what is under test.
+        self.analyzer = _NameAnalyzer()
+        self.engine_key = (self.MODEL_NAME, ("en",))
+        TextRedactor._engine_cache[self.engine_key] = (self.analyzer, AnonymizerEngine())
+        self.redactor = TextRedactor(spacy_model_name=self.MODEL_NAME, default_mode=RedactionMode.REPLACE)
+
+    def tearDown(self):
+        TextRedactor._engine_cache.pop(self.engine_key, None)
+
+    def test_repeated_text_is_served_from_cache(self):
+        first = self.redactor.redact_text("Hello Alice")
+        second = self.redactor.redact_text("Hello Alice")
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], "Hello <PERSON>")
+        self.assertEqual(self.analyzer.calls, 1)
+        self.assertEqual(self.redactor.get_cache_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    def test_cached_entities_are_copies(self):
+        """Changing returned entities does not change what the next hit returns."""
+        _, entities = self.redactor.redact_text("Hello Alice")
+        entities[0].redacted_value = "changed"
+        _, cached_entities = self.redactor.redact_text("Hello Alice")
+        self.assertNotEqual(cached_entities[0].redacted_value, "changed")
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.redactor.REDACTION_CACHE_SIZE = 2
+        for text in ("Alice one", "Alice two", "Alice one", "Alice three"): # "two" is now least recently used
+            self.redactor.redact_text(text)
+        self.assertEqual(self.analyzer.calls, 3)
+        self.redactor.redact_text("Alice one")
+        self.assertEqual(self.analyzer.calls, 3)
+        self.redactor.redact_text("Alice two")
+        self.assertEqual(self.analyzer.calls, 4)
+
+    def test_min_confidence_change_is_not_served_stale(self):
+        self.assertEqual(self.redactor.redact_text("Hello Alice")[0], "Hello <PERSON>")
+        self.redactor.min_confidence = 0.8 # Above the analyzer's 0.7 score
+        self.assertEqual(self.redactor.redact_text("Hello Alice"), ("Hello Alice", []))
+
+    def test_long_text_is_not_cached(self):
+        text = "Alice " + "x" * TextRedactor.REDACTION_CACHE_MAX_TEXT_LENGTH
+        self.redactor.redact_text(text)
+        self.redactor.redact_text(text)
+        self.assertEqual(self.analyzer.calls, 2)
+        self.assertEqual(self.redactor.get_cache_stats()["size"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
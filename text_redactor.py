@@ -7,7 +7,8 @@ import logging
 from typing import List, Dict, Tuple, Optional, Any
 import json
 import re
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from enum import Enum
 
 # Configure logging
@@ -39,6 +40,14 @@ class TextRedactor:
     Supports multiple redaction modes, custom operators, entity allowlisting,
     and comprehensive PII detection with detailed reporting.
     """
+
+    # Short segments ("yes", "uh huh", ASR re-emissions) repeat often; their results are kept in an LRU cache.
+    REDACTION_CACHE_SIZE = 4096
+    REDACTION_CACHE_MAX_TEXT_LENGTH = 256
+
+    # Presidio engines (spaCy model + compiled recognizer patterns) are expensive to build and hold no
+    # per-redactor state, so they are shared by every TextRedactor with the same model and languages.
+    _engine_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[AnalyzerEngine, AnonymizerEngine]] = {}
     
     def __init__(self, 
                  spacy_model_name: str = "en_core_web_sm",
@@ -86,11 +95,23 @@ class TextRedactor:
             "US_DRIVER_LICENSE": "[LICENSE]"
         }
         
+        # (text, language, mode, entity_types, min_confidence) -> (redacted_text, pii_entities), most recently used last
+        self._redaction_cache: "OrderedDict[tuple, Tuple[str, List[PIIEntity]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         self._initialize_engines()
         self._setup_operators()
     
     def _initialize_engines(self) -> None:
-        """Initialize Presidio analyzer and anonymizer engines."""
+        """Initialize Presidio analyzer and anonymizer engines, reusing ones already built for this configuration."""
+        cache_key = (self.spacy_model_name, tuple(self.supported_languages))
+        cached_engines = TextRedactor._engine_cache.get(cache_key)
+        if cached_engines is not None:
+            self.analyzer, self.anonymizer = cached_engines
+            logger.info(f"Reusing Presidio engines for spaCy model: {self.spacy_model_name}")
+            return
+
         try:
             # Try to load spaCy model
             spacy.load(self.spacy_model_name)
@@ -106,6 +127,7 @@ class TextRedactor:
             self.analyzer = AnalyzerEngine(supported_languages=self.supported_languages)
         
         self.anonymizer = AnonymizerEngine()
+        TextRedactor._engine_cache[cache_key] = (self.analyzer, self.anonymizer)
     
     def _setup_operators(self) -> None:
         """Setup custom operators for different redaction modes."""
@@ -138,6 +160,7 @@ class TextRedactor:
         if entity_type not in self.allowlisted_entities:
             self.allowlisted_entities[entity_type] = []
         self.allowlisted_entities[entity_type].append(entity_value.lower())
+        self._redaction_cache.clear()  # Cached results may contain the newly allowlisted value
     
     def set_custom_replacement(self, entity_type: str, replacement: str) -> None:
         """
@@ -151,6 +174,7 @@ class TextRedactor:
         self.operators[RedactionMode.CUSTOM][entity_type] = OperatorConfig(
             "replace", {"new_value": replacement}
         )
+        self._redaction_cache.clear()  # Cached results may use the old replacement
     
     def _is_allowlisted(self, entity_text: str, entity_type: str) -> bool:
         """Check if an entity is in the allowlist."""
@@ -194,6 +218,18 @@ class TextRedactor:
             return "", []
         
         mode = mode or self.default_mode
+
+        cache_key = None
+        if len(text_to_redact) <= self.REDACTION_CACHE_MAX_TEXT_LENGTH:
+            # min_confidence is a public attribute read on every analysis, so it is part of the key
+            cache_key = (text_to_redact, language, mode, tuple(entity_types) if entity_types else None, self.min_confidence)
+            cached = self._redaction_cache.get(cache_key)
+            if cached is not None:
+                self._redaction_cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                redacted_text, pii_entities = cached
+                return redacted_text, [replace(entity) for entity in pii_entities]  # Callers may modify entities
+            self.cache_misses += 1
         
         try:
             # Analyze text for PII
@@ -245,6 +281,11 @@ class TextRedactor:
                     )
                 
                 pii_entities.append(entity)
+
+            if cache_key is not None:  # Failed redactions (below) are never cached
+                self._redaction_cache[cache_key] = (redacted_text, [replace(entity) for entity in pii_entities])
+                if len(self._redaction_cache) > self.REDACTION_CACHE_SIZE:
+                    self._redaction_cache.popitem(last=False)
             
             return redacted_text, pii_entities
             
@@ -252,6 +293,15 @@ class TextRedactor:
             logger.error(f"Error during text redaction: {e}")
             return text_to_redact, []
     
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Get redaction cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses and current number of cached entries
+        """
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self._redaction_cache)}
+    
     def _find_redacted_value(self, entity: PIIEntity, mode: RedactionMode, redacted_text: str) -> str:
         """Attempt to find what value replaced the original entity."""
         if mode == RedactionMode.REPLACE:
@@ -4,6 +4,7 @@ import random
 from PyQt5.QtWidgets import QApplication, QWidget
 from PyQt5.QtGui import QPainter, QColor, QBrush
 from PyQt5.QtCore import QTimer, QRectF, Qt
+from queue_utils import drain_queue
 
 class VUMeterWidget(QWidget):
     def __init__(self, audio_chunk_queue=None, parent=None):
@@ -24,6 +25,13 @@ class VUMeterWidget(QWidget):
         self.current_rms_level = 0.0 # Reset level when queue changes
         self.max_rms_level = 0.001   # Reset max level
 
+    def update_vu(self, rms_level):
+        """Sets the displayed level directly (used when the owner polls levels instead of using a queue)."""
+        self.current_rms_level = rms_level
+        if self.current_rms_level > self.max_rms_level:
+            self.max_rms_level = self.current_rms_level
+        self.update()
+
     def _update_level(self):
         if self.audio_chunk_queue:
             try:
@@ -34,8 +42,7 @@ class VUMeterWidget(QWidget):
                 items_count = 0
                 max_in_batch = 0
 
-                while not self.audio_chunk_queue.empty():
-                    rms = self.audio_chunk_queue.get_nowait()
+                for rms in drain_queue(self.audio_chunk_queue):
                     if rms > max_in_batch:
                         max_in_batch = rms
                     items_count +=1